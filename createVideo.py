@@ -1,6 +1,8 @@
 # imports
 import os
 import cv2
+import queue
+import threading
 from tqdm import tqdm
 
 def createVideo(path, outfolder, name, fps = 60):
@@ -25,3 +27,70 @@ def createVideo(path, outfolder, name, fps = 60):
 
     cv2.destroyAllWindows()
     video.release()
+
+class VideoEncoder(threading.Thread):
+    '''
+    inputs: path of the video to write, frames per second, index of the first frame, maximum number of frames waiting to be encoded
+
+    The goal of this object is to encode frames into a video on its own thread while later frames are still being rendered.
+    Frames can be handed over in any order; they are written in index order.
+    '''
+    def __init__(self, path, fps = 60, first = 1, maxsize = 64):
+        super().__init__(daemon=True)
+        self.path = path
+        self.fps = fps
+        self.next = first # index of the next frame to write
+        self.queue = queue.Queue(maxsize=maxsize) # bounded so rendering waits when encoding falls behind
+        self.pending = {} # frames that arrived before the frames in front of them
+        self.video = None
+        self.error = None
+
+    def put(self, index, image):
+        '''
+        inputs: frame index, path to the frame image or the image array itself
+
+        The goal of this function is to hand a finished frame to the encoder; blocks while the queue is full.
+        '''
+        self.queue.put((index, image))
+
+    def close(self):
+        '''
+        inputs: none
+
+        The goal of this function is to wait for every frame handed over to be written and finish the video.
+        '''
+        self.queue.put(None) # no more frames
+        self.join()
+        if self.error != None:
+            raise self.error
+
+    def write(self, image):
+        frame = cv2.imread(image) if isinstance(image, str) else image # rendered arrays skip reading the png back
+        if self.video == None: # first frame sets the size of the video
+            height, width, layers = frame.shape
+            self.video = cv2.VideoWriter(self.path, 0, self.fps, (width, height))
+        self.video.write(frame)
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item == None:
+                break
+            if self.error != None: # keep emptying the queue so rendering is never stuck waiting
+                continue
+            index, image = item
+            self.pending[index] = image
+            try:
+                while self.next in self.pending: # write every frame that is now in order
+                    self.write(self.pending.pop(self.next))
+                    self.next += 1
+            except Exception as e:
+                self.error = e
+        try:
+            if self.error == None:
+                for index in sorted(self.pending): # frames after a missing one
+                    self.write(self.pending[index])
+        except Exception as e:
+            self.error = e
+        if self.video != None:
+            self.video.release()
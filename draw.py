@@ -13,15 +13,20 @@ from readYaml import readYaml
 import random
 
 
-def openSSD(pathSSD: str, outpath: str = None, num_frames: str = 1200):
+def openSSD(pathSSD: str, outpath: str = None, num_frames: str = 1200, incremental: bool = False):
   '''
-  inputs: path to SDD, optional outpath to save parsed sdd file
+  inputs: path to SDD, optional outpath to save parsed sdd file, flag to only parse lines appended since the last run with the same outpath
   outputs: parsedSDD dataframe object
   
   The goal of this function is use the SDDReport object to save the parsed SDD.
   '''
+  if incremental and outpath != None: # parsed state of the last run is kept in the output folder
+    sdd = SDDReport.openIncremental(pathSSD, os.path.join(outpath, "parsedState.pkl"), num_frames, path=outpath)
+    return sdd.parsedDf, sdd.volumes, sdd
+
   sdd = SDDReport(pathSSD) # create SDD object
-  sdd.normalizeSDDFile(os.path.join(outpath, "normalizedSDD.sdd"))
+  if outpath != None: # only write the normalized sdd when there is somewhere to save it
+    sdd.normalizeSDDFile(os.path.join(outpath, "normalizedSDD.sdd"))
   dimensions, chromosomeInfo, damageInfo, cause, breakSpecs, times = sdd.parseVizInfo(sdd.damages, num_frames) # create parsed dataframes of important data
   parsedSdd = sdd.saveParsed(dimensions, chromosomeInfo, damageInfo, cause, breakSpecs, times, path=outpath) # create a dataframe with parsed SDD data for visualization
 
@@ -54,14 +59,101 @@ def scalePositionalData(originaldf: pd.DataFrame, width: int, length: int):
     df["xmax"], df["ymax"], df["zmax"] = ScalePos(df["xmax"], sx), ScalePos(df["ymax"], sy), ScalePos(df["zmax"], sz)
     df["xmin"], df["ymin"], df["zmin"] = ScalePos(df["xmin"], sx), ScalePos(df["ymin"], sy), ScalePos(df["zmin"], sz)
 
+  # statistics of the positions describe the unscaled values so they are dropped
+  df.attrs["stats"] = {name: stats for name, stats in df.attrs.get("stats", {}).items() if name not in SDDReport.dimensionsHeaders}
   return df, sx, sy, sz
 
+def scaleNucleus(volumes: list, sx: MinMaxScaler, sy: MinMaxScaler, sz: MinMaxScaler):
+  '''
+  inputs: volumes list from the sdd header, scalers for x, y, z positional data
+  outputs: list of nucleus shape, scaled x, y, z radii and scaled x, y, z center; empty if no volume information
+
+  The goal of this function is to put the nucleus volume on the same scale as the damage centers.
+  '''
+  nucleusAxes = []
+  if len(volumes) > 7: # cell and nucleus both given so use the nucleus
+    nucleusAxes = [int(volumes[7]), sx.transform([[volumes[8]]]).item(), sy.transform([[volumes[9]]]).item(), sz.transform([[volumes[10]]]).item(), sx.transform([[volumes[11]]]).item(), sy.transform([[volumes[12]]]).item(), sz.transform([[volumes[13]]]).item()]
+  elif len(volumes) == 7: # only one volume given
+    nucleusAxes = [int(volumes[0]), sx.transform([[volumes[1]]]).item(), sy.transform([[volumes[2]]]).item(), sz.transform([[volumes[3]]]).item(), sx.transform([[volumes[4]]]).item(), sy.transform([[volumes[5]]]).item(), sz.transform([[volumes[6]]]).item()]
+  return nucleusAxes
+
 def scaleSizes(originaldf: pd.DataFrame, width: int, length: int):
     df = originaldf.copy()
     sizeScaler = MinMaxScaler(feature_range = (1, 5))
     df['totalDamages'] = sizeScaler.fit_transform(pd.DataFrame(df['totalDamages']))
+    df.attrs["stats"] = {name: stats for name, stats in df.attrs.get("stats", {}).items() if name != 'totalDamages'} # sizes are no longer damage counts
     return df
 
+def bucketFrames(df: pd.DataFrame, num_frames: int):
+  '''
+  inputs: parsedSDD dataframe with lesion times scaled to [1, num_frames], number of frames
+  outputs: dataframe reordered by frame and array of offsets where the rows of frame b are offsets[b] to offsets[b+1]
+
+  The goal of this function is to sort damages into frame bins once so each frame is a slice instead of a scan of the whole dataframe.
+  A damage belongs to frame ceil(lesiontime), so it shows up in frame i exactly when lesiontime <= i.
+  Damages without a time (NaN) go in frame 0, which is never drawn, since lesiontime <= i is never true for them.
+  '''
+  times = df["lesiontimes"].to_numpy(dtype=float)
+  bins = np.zeros(len(times), dtype=np.int64)
+  timed = times < np.inf # false for NaN and infinity, which no frame reaches
+  bins[timed] = np.clip(np.ceil(times[timed]), 1, num_frames) # frame each damage first appears in
+  counts = np.bincount(bins, minlength=num_frames + 1) # number of damages per frame (frame 0 only holds damages that are never shown)
+  offsets = np.concatenate([[0], np.cumsum(counts)]) # start of every frame bin in the reordered dataframe
+  order = np.argsort(bins.astype(np.uint16) if num_frames < 2**16 else bins, kind="stable") # small integer keys are radix sorted, i.e. a counting sort
+  return df.iloc[order], offsets
+
+def frameRows(offsets: np.ndarray, frame: int, window: int = None):
+  '''
+  inputs: frame offsets from bucketFrames, frame index, optional number of most recent frames to keep
+  outputs: start and end row of the frame in the bucketed dataframe
+
+  The goal of this function is to find the rows shown in a frame; all damage so far by default or only damage from the last window frames.
+  '''
+  first = 1 if window == None else max(1, frame - window + 1) # first frame bin still on screen
+  return offsets[first], offsets[frame + 1]
+
+def columnStats(df: pd.DataFrame, key: str):
+  '''
+  inputs: dataframe, column header
+  outputs: statistics of the column from parsing, or None if there are none
+
+  The goal of this function is to read the column summaries that SDDReport.saveParsed stores with the dataframe.
+  '''
+  return df.attrs.get("stats", {}).get(key)
+
+def anyValue(df: pd.DataFrame, key: str, comparison: str, value):
+  '''
+  inputs: dataframe, column header, comparison ('>', '<' or '=='), value to compare with
+  outputs: whether any value of the column passes the comparison
+
+  The goal of this function is to answer filter checks from the column statistics and only scan the column when there are none.
+  '''
+  stats = columnStats(df, key)
+  if comparison == ">":
+    return stats["max"] > value if stats != None and stats["max"] != None else bool((df[key] > value).any())
+  elif comparison == "<":
+    return stats["min"] < value if stats != None and stats["min"] != None else bool((df[key] < value).any())
+  elif stats != None and stats["values"] != None:
+    return value in stats["values"]
+  else:
+    return bool((df[key] == value).any())
+
+def distinctValues(df: pd.DataFrame, key: str):
+  '''
+  inputs: dataframe, column header
+  outputs: list of the distinct values of the column
+
+  The goal of this function is to get the values to build colors and legends by from the column statistics instead of calling unique() on the column.
+  '''
+  stats = columnStats(df, key)
+  if stats != None and stats["values"] != None:
+    return list(stats["values"])
+  values = list(df[key].unique()) # find unique values of the column
+  try:
+    return sorted(values) # same order as the statistics so colors do not depend on whether they were kept
+  except TypeError: # mixed types cannot be sorted
+    return values
+
 def filter(df: pd.DataFrame, filterFilePath: str):
   '''
   inputs: parsedSDD and file path to filtering configurations
@@ -91,11 +183,11 @@ def filter(df: pd.DataFrame, filterFilePath: str):
         pass
       elif (newDict[key]['less'] != None and newDict[key]['greater'] != None) and (newDict[key]['less'] > newDict[key]['greater'] or newDict[key]['less'] == newDict[key]['greater']): # checking to see if less and greater are appropriately selected
         print(f"Invalid arguments for {key} in {filterFilePath}. The less than value is larger than the greater than value or is equal to it.")
-      elif newDict[key]['equal'] != None and newDict[key]['equal'] not in newdf[key]: # checking to see if the equal selection is even present
+      elif newDict[key]['equal'] != None and not anyValue(newdf, key, "==", newDict[key]['equal']): # checking to see if the equal selection is even present
         print(f"Invalid arguments for {key} in {filterFilePath}. {newDict[key]['equal']} is not in this dataframe.")
-      elif newDict[key]['greater'] != None and len(newdf[newdf[key] > newDict[key]['greater']]) == 0: # checking to see if the greater than selection is even present
+      elif newDict[key]['greater'] != None and not anyValue(newdf, key, ">", newDict[key]['greater']): # checking to see if the greater than selection is even present
         print(f"Invalid arguments for {key} in {filterFilePath}. There is no value in the dataframe greater than {newDict[key]['greater']}.")
-      elif newDict[key]['less'] != None and len(newdf[newdf[key] < newDict[key]['less']]) == 0: # checking to see if the less than selection is even present
+      elif newDict[key]['less'] != None and not anyValue(newdf, key, "<", newDict[key]['less']): # checking to see if the less than selection is even present
         print(f"Invalid arguments for {key} in {filterFilePath}. There is no value in the dataframe less than {newDict[key]['less']}.")
       else:
         # try except clauses to catch any other issues not addressed and/or apply conditions without more complex logic
@@ -123,6 +215,7 @@ def filter(df: pd.DataFrame, filterFilePath: str):
     # apply filter for every key on the dataframe if present
     if len(filters) != 0:
       newdf = newdf[newdf[key].isin(filters)]
+      newdf.attrs["stats"] = {} # statistics of the unfiltered rows no longer apply; checks and labels scan the remaining rows instead
     else:
       pass
 
@@ -147,12 +240,14 @@ def label(df: pd.DataFrame, labelFilePath: str):
   for key in list(newDict.keys()): # iterate through each key in the color coordination dictionary
     if newDict[key]['labelby']: # check if user wants to coordinate by this key
       plotBy.append(key) # add the key to the list
-      for i in df.index: # iterate through each row in the dataframe
-        # try except in case user does not include labels
-        try:
-          df[key][i] = newDict[key]['labels'][df[key][i]] # apply user desired labels to the unique values of the column the key represents
-        except:
-          pass
+      labels = newDict[key].get('labels') # blank or missing labels keep the values as they are
+      if isinstance(labels, dict): # skip if user does not include labels
+        values = distinctValues(df, key)
+        mapping = {value: labels.get(value, value) for value in values} # apply user desired labels to the unique values of the column the key represents; values without a label stay the same
+        df[key] = df[key].map(mapping)
+        stats = dict(df.attrs.get("stats", {})) # new dictionary so other dataframes sharing the statistics keep theirs
+        stats[key] = {"min": None, "max": None, "histogram": None, "values": list(dict.fromkeys(mapping[value] for value in values)), "counts": None} # labels in the same order as the values
+        df.attrs["stats"] = stats
 
   return plotBy, df
 
@@ -173,7 +268,32 @@ def graphNucleus(ax, volumes):
       z = rz * np.cos(v)
 
       ax.plot_surface(x, y, z, alpha=0.10, color='m')
-  
+
+def graphPoints(ax, df: pd.DataFrame, key: str, size: bool, colorlist: list, uniqueVals: list = None):
+  '''
+  inputs: 3D axis, dataframe to plot, column to color coordinate by (None for unlabelled), flag to modulate point size, list of colors, optional list of unique values to fix colors by
+  outputs: None; points are drawn onto the axis
+
+  The goal of this function is to draw all damage centers with one scatter call per label instead of one plot call per point.
+  '''
+  x, y, z = df['xcenter'].to_numpy(dtype=float), df['ycenter'].to_numpy(dtype=float), df['zcenter'].to_numpy(dtype=float)
+  if "totalDamages" in df.columns and size: # if direct and indirect (changing size of damage on plot since basically the number of damages)
+    sizes = np.square(df["totalDamages"].to_numpy(dtype=float)) # scatter sizes are areas so square the marker sizes
+  else: # same size for all points
+    sizes = np.ones(len(df.index))
+
+  if key == None: # unlabelled graph
+    ax.scatter(x, y, z, marker=".", color='k', s=sizes, depthshade=False)
+    return
+
+  if uniqueVals == None:
+    uniqueVals = distinctValues(df, key)
+  labels = df[key].to_numpy()
+  for l in uniqueVals: # one scatter per unique value so each label gets a single legend entry
+    mask = labels == l
+    if mask.any():
+      ax.scatter(x[mask], y[mask], z[mask], marker=".", color=colorlist[uniqueVals.index(l) % len(colorlist)], s=sizes[mask], label=l, depthshade=False)
+
 
 def graph(df: pd.DataFrame, labelCoordinateList: list, outputDir: str, volumes: list, size: bool, angle_tup: tuple = None):
   '''
@@ -189,25 +309,10 @@ def graph(df: pd.DataFrame, labelCoordinateList: list, outputDir: str, volumes:
     print(f"Creating graph labeled by {key}...")
     fig = plt.figure() # create new fig object
     ax = fig.add_subplot(111, projection="3d") # create a 3D plot in figure
-    uniqueVals = list(df[key].unique()) # find unique values of the column
-    left = uniqueVals.copy() # copy a index tracker for which labels used
     graphNucleus(ax, volumes)
-    for x, y, z, l, i in tqdm(zip(df['xcenter'], df['ycenter'], df['zcenter'], df[key], df.index), total=len(df.index)): # iterate through centers, labelled column and index in dataframe
-      if l in left: # if label still in index tracker (meaning no labelled values by this unique value)
-        if "totalDamages" in df.columns and size: # if direct and indirect (changing size of damage on plot since basically the number of damages)
-          ax.plot3D(x, y, z, marker=".", color=colorlist[uniqueVals.index(l)], markersize=(df["totalDamages"][i]), label = l) # plot point with label, its own unique color, and size
-          left.remove(l) # remove from index to not reuse and create a large legend (weird workaround pyplot)
-        else: # if direct and indirect not in dataframe
-          ax.plot3D(x, y, z, marker=".", color=colorlist[uniqueVals.index(l)], markersize=1, label = l) # cannot change size of points
-          left.remove(l) # remove since first time using this label in legend
-      
-      else: # if label not in index list for unique values
-        if "totalDamages" in df.columns and size:# if direct and indirect (changing size of damage on plot since basically the number of damages)
-          ax.plot3D(x, y, z, marker=".", color=colorlist[uniqueVals.index(l)], markersize=(df["totalDamages"][i])) # plot point without label since already applied but color will be unique to label
-        else: # if no direct, indirect
-          ax.plot3D(x, y, z, marker=".", color=colorlist[uniqueVals.index(l)], markersize=1) # size not modulated by number of damages in the center damage point
-      if angle_tup != None:
-        ax.view_init(angle_tup[0], angle_tup[1])
+    graphPoints(ax, df, key, size, colorlist, distinctValues(df, key)) # colors and legend entries from the column statistics
+    if angle_tup != None:
+      ax.view_init(angle_tup[0], angle_tup[1])
     plt.legend(loc="upper right", ncol = 6, fontsize = "xx-small") # apply legend
     fig.savefig(os.path.join(outputDir, f"damage_{key}.png"))
     plt.close(fig) # close to avoid overlaps
@@ -217,12 +322,7 @@ def graph(df: pd.DataFrame, labelCoordinateList: list, outputDir: str, volumes:
   fig = plt.figure() # create new figure
   ax = fig.add_subplot(111, projection="3d") # add 3D component
   graphNucleus(ax, volumes)
-  if "totalDamages" in df.columns and size: # if direct and indirect (changing size of damage on plot since basically the number of damages)
-    for x, y, z, i in tqdm(zip(df['xcenter'], df['ycenter'], df['zcenter'], df.index), total=len(df.index)): # iterate through centers, labelled column and index in dataframe
-      ax.plot3D(x, y, z, marker=".", color='k', markersize=(df["totalDamages"][i])) # graph with size modulation and no labels
-  else: # if no direct/indirect
-    for x, y, z, i in tqdm(zip(df['xcenter'], df['ycenter'], df['zcenter'], df.index)): # iterate through centers, labelled column and index in dataframe
-      ax.plot3D(x, y, z, marker=".", markersize=1, color='k') # same size for all points
+  graphPoints(ax, df, None, size, colorlist)
   if angle_tup != None:
         ax.view_init(angle_tup[0], angle_tup[1])
 
@@ -4,8 +4,108 @@ import numpy as np
 from sklearn.preprocessing import MinMaxScaler
 import csv
 import os
+import json
+import io
+import pickle
+import hashlib
 from itertools import compress
 
+class SDDHeader:
+    '''
+    inputs: path to sdd file
+
+    The goal of this object is to read only the header of an sdd file and store every header field as a typed value.
+    Reading stops at the end of header marker, so header only questions (columns present, volumes, etc.) do not touch the damage data.
+    The byte offset of the first data line is kept so data reading code can seek straight to it.
+    '''
+    # header field name in the sdd: (attribute name, type of the value)
+    # str is the whole value, the list types are comma separated values and bool is the 1/0 data entries list
+    fieldTypes = {"SDD version": ("sddVersion", str), "Software": ("software", str), "Author": ("author", str), \
+                  "Simulation Details": ("simulationDetails", str), "Source": ("source", str), "Source type": ("sourceType", int), \
+                    "Incident particles": ("incidentParticles", [int]), "Mean particle energy": ("meanParticleEnergy", float), \
+                        "Energy distribution": ("energyDistribution", [str]), "Particle fraction": ("particleFraction", [float]), \
+                            "Dose or fluence": ("doseOrFluence", [float]), "Dose rate": ("doseRate", float), \
+                                "Irradiation target": ("irradiationTarget", str), "Volumes": ("volumes", [float]), \
+                                    "Chromosome sizes": ("chromosomeSizes", [float]), "DNA Density": ("dnaDensity", float), \
+                                        "Cell Cycle Phase": ("cellCyclePhase", [float]), "DNA Structure": ("dnaStructure", [int]), \
+                                            "In vitro / in vivo": ("inVitroInVivo", int), "Proliferation status": ("proliferationStatus", [str]), \
+                                                "Microenvironment": ("microenvironment", [float]), "Damage definition": ("damageDefinition", [float]), \
+                                                    "Time": ("time", float), "Damage and primary count": ("damageAndPrimaryCount", [int]), \
+                                                        "Data entries": ("dataEntries", [bool]), "Additional information": ("additionalInformation", str)}
+
+    def __init__(self, sddPath: str):
+
+        self.path = sddPath
+        self.fields = {} # every header field by its name in the sdd, including ones not in fieldTypes
+        self.lines = [] # non blank header lines including the end of header marker
+        self.dataOffset = None # byte offset of the first line after the end of header marker
+        for attribute, typ in SDDHeader.fieldTypes.values(): # fields missing from the header stay None
+            setattr(self, attribute, None)
+
+        with open(sddPath, "rb") as file: # binary so tell() gives a byte offset that can be used with seek()
+            for raw in iter(file.readline, b""): # reading one line at a time until the end of the header
+                line = raw.decode().replace("\r\n", "\n") # same line endings as reading in text mode
+                if line.isspace():
+                    continue
+                self.lines.append(line)
+                if "EndOfHeader" in line: # end of header marker means data starts on the next line
+                    self.dataOffset = file.tell()
+                    break
+                self.parseLine(line)
+
+        if self.dataOffset == None:
+            raise ValueError(f"No end of header marker found in {sddPath}.")
+
+    @classmethod
+    def convert(cls, value: str, typ: any):
+        '''
+        inputs: unparsed value of a header field, type of the value
+        outputs: typed value
+
+        The goal of this function is to convert a header value into its type.
+        '''
+        if typ == str:
+            return value.strip()
+        elif type(typ) == list: # comma separated list of values
+            items = [item.strip() for item in value.split(",") if not item.isspace() and item != ""]
+            if typ[0] == bool: # data entries are 1 for present and 0 for absent
+                return [int(item) == 1 for item in items]
+            return [typ[0](item) for item in items]
+        else:
+            return typ(value.strip())
+
+    def parseLine(self, line: str):
+        '''
+        inputs: single header line
+        outputs: None; field is stored on the object
+
+        The goal of this function is to split a header line into its field name and value and store the value with its type.
+        '''
+        content = line.split(";")[0] # everything after the semicolon is a comment
+        if "," not in content:
+            return
+        name, value = content.split(",", 1) # field name is before the first comma
+        name = name.strip()
+        self.fields[name] = value.strip()
+        if name in SDDHeader.fieldTypes:
+            attribute, typ = SDDHeader.fieldTypes[name]
+            try:
+                setattr(self, attribute, SDDHeader.convert(value, typ))
+            except ValueError: # keep the raw value if the field does not match its type
+                print(f"Could not read header field {name} as {typ}. Keeping the value as text.")
+                setattr(self, attribute, value.strip())
+
+    def columns(self):
+        '''
+        inputs: none
+        outputs: list of sdd columns present in the file
+
+        The goal of this function is to apply the data entries field to the default sdd column headers.
+        '''
+        if self.dataEntries == None:
+            return list(SDDReport.originalColumnHeaders)
+        return list(compress(SDDReport.originalColumnHeaders, self.dataEntries))
+
 class SDDReport:
     '''
     inputs: path to sdd file
@@ -23,10 +123,22 @@ class SDDReport:
     damageInfoHeaders = ["numBases", "singleNumber", "dsbPresent"] # default column headers for damage information
     causeHeaders = ["identifier", "direct", "indirect"] # default column headers for damage causes
     breakSpecsHeaders = ["strand", "base", "identifier"] # default column headers for damage causes
+    # compact types of the parsed columns; coordinates as float32, categorical codes as small ints and counts as uint16
+    parsedSchema = {"xcenter": np.float32, "ycenter": np.float32, "zcenter": np.float32, \
+                    "xmax": np.float32, "ymax": np.float32, "zmax": np.float32, \
+                        "xmin": np.float32, "ymin": np.float32, "zmin": np.float32, \
+                            "structure": np.int8, "chromsomeNumber": np.int16, "chromatidNumber": np.int8, "arm": np.int8, \
+                                "numBases": np.uint16, "singleNumber": np.uint16, "dsbPresent": np.int8, \
+                                    "cause": np.int8, "identifier": np.int8, "direct": np.uint16, "indirect": np.uint16, "directNIndirect": np.uint16, \
+                                        "lesiontimes": np.float32, "totalDamages": np.uint16}
+    statsDistinctLimit = 1024 # integer columns spanning more values than this do not keep their distinct values
 
-    def __init__(self, sddPath: str):
+    def __init__(self, sddPath: str, start: int = None, end: int = None):
         
-        self.originalDF, self.volumes, self.damages, self.header = SDDReport.openNStore(sddPath, return_header=True)
+        self.path = sddPath
+        self.headerInfo = SDDHeader(sddPath) # typed header fields
+        self.originalDF, self.volumes, self.damages, self.header = SDDReport.openNStore(sddPath, return_header=True, header=self.headerInfo, start=start, end=end)
+        self.dataEnd = end if end != None else os.path.getsize(sddPath) # byte offset just after the last data read
 
     @classmethod
     def splitAny(cls, val: str, typ: any, sep: str):
@@ -63,56 +175,34 @@ class SDDReport:
         return vals
 
     @classmethod
-    def openNStore(cls, path: str, return_header=False):
+    def openNStore(cls, path: str, return_header=False, header: SDDHeader = None, start: int = None, end: int = None):
         '''
-        inputs: path for sdd
+        inputs: path for sdd, optional header object if already read, optional byte offsets of the first and last data to read
         outputs: opened DF
         
         The goal of this function is to open an SDD and separate into its individuals columns unparsed and without header. Class method since no need for instance specific changes.
+        The header is read by SDDHeader and the data is read from the data offset, so no line of the data is scanned for header fields.
+        Start and end must fall on line boundaries; they let only the lines appended since an earlier read be opened.
         '''
-        skiprow = 0 # determining row at which the actual data starts
-        columnrow = list() # boolean list for which columns are present in the SDD file
-        volumerow = list()
-
-        file = open(path, "r") # opening file
-        lines = file.readlines() # reading file lines as list
-
-        tempfile = open("./temp.csv", "w")
-
-        newLines = []
-        for line in lines:
-            if not line.isspace():
-                newLines.append(line)
-                tempfile.write(line)
-
-        # add try except for space delimitation
-        for i, line in enumerate(newLines): # iterating through list
-            if "EndOfHeader" in line: # looking for end of header marker to determine where data rows begin
-                skiprow = i+1 # assigning the index were data starts
-            if "Data entries" in line: # looking for binary data list to determine which columns present
-                columnrow = line[line.index("Data entries,")+len("Data entries,"):-2].split(",") # finding string list with binary info. and spliting into list of ints
-                columnrow = [True if int(item) == 1 else False for item in columnrow] # converting 1, 0s to booleans
-            if "Volumes" in line:
-                volumerow = line[line.index("Volumes,")+len("Volumes,"):-2].split(",")
-                volumerow = [float(item) for item in volumerow]
-            if "Damage definition" in line:
-                damage = line[line.index("Damage definition,")+len("Damage definition,"):-2].split(",")
-                damage = [str(item) for item in damage]
-
-        header_string = newLines[:skiprow]
-
-        with open("./temp.csv", "r") as file2: # opening file again to read sdd
-            df = pd.read_csv(file2, sep=";", header = None, skiprows = skiprow) # opening sdd as a DF with appropriate skipping
-            df.dropna(axis=1, how="all", inplace=True) # remove columns with all NAs if any present (separator is a bit odd)
-
-            columns = list(compress(cls.originalColumnHeaders, columnrow)) # applying boolean list to default column headers
-            df.columns = columns # setting default column headers 
-        # os.remove("./temp.csv")
+        if header == None:
+            header = SDDHeader(path) # reads only up to the end of header marker
+
+        with open(path, "rb") as file: # opening file again to read sdd
+            file.seek(start if start != None else header.dataOffset) # skipping straight to the data
+            source = io.BytesIO(file.read(end - file.tell())) if end != None else file # only the lines before end
+            try:
+                df = pd.read_csv(source, sep=";", header = None) # opening sdd as a DF; blank lines are skipped by read_csv
+                df.dropna(axis=1, how="all", inplace=True) # remove columns with all NAs if any present (separator is a bit odd)
+
+                df.columns = header.columns() # setting default column headers of the columns present
+            except pd.errors.EmptyDataError: # no data lines yet or only blank lines
+                df = pd.DataFrame(columns=header.columns())
         
+        volumes = header.volumes if header.volumes != None else [] # no volume information means no nucleus to draw
         if return_header:
-            return df, volumerow, damage, header_string
+            return df, volumes, header.damageDefinition, header.lines
         else:
-            return df, volumerow, damage
+            return df, volumes, header.damageDefinition
     
     def extractCol(self, colName: str):
         return self.originalDF[colName]
@@ -178,53 +268,93 @@ class SDDReport:
                     normalized_file.write(f"{row}\n")
 
 
+    @classmethod
+    def fillArray(cls, rows, parseRow, dtype):
+        '''
+        inputs: column of unparsed rows, function that parses one row into a list of values, numpy type of the values
+        outputs: 2D array with a row per sdd row and a column per parsed value
+
+        The goal of this function is to parse a column straight into a preallocated array instead of building a list of lists.
+        '''
+        array = None
+        for i, row in enumerate(rows): # iterating through rows of the column
+            values = parseRow(row) # parsed values of this row
+            if array is None: # the first row sets the number of parsed values
+                array = np.empty((len(rows), len(values)), dtype=dtype, order="F") # column major so every parsed column is contiguous
+            array[i] = values
+        return array
+
+    @classmethod
+    def splitRow(cls, row, typ: any, sep: str = ","):
+        '''
+        inputs: unparsed entry, final type of the split values, separator
+        outputs: list of split values
+
+        The goal of this function is to split an entry by its separator and fall back to spaces, which some sdd files use instead.
+        '''
+        try:
+            return SDDReport.splitAny(str(row), typ, sep) # split values by separator
+        except:
+            return SDDReport.splitAny(str(row), typ, " ") # split values by spaces
+
+    @classmethod
+    def splitPositions(cls, row):
+        '''
+        inputs: unparsed xyz entry
+        outputs: list of center, max and min coordinates
+
+        The goal of this function is to flatten the slash and comma delimited positions of one damage.
+        '''
+        temp = [] # temporary list to store values from each row
+        if '/' in row:
+            try:
+                for l in SDDReport.splitBoth(str(row), type(0.0), secondSplit=','): # split values into floats
+                    temp += l # extend temp list with values from row
+            except:
+                temp = []
+                for l in SDDReport.splitBoth(str(row), type(0.0), secondSplit=' '): # split values into floats
+                    temp += l # extend temp list with values from row
+        else:
+            temp = SDDReport.splitRow(row, type(0.0)) # split values into floats
+        return temp
+
+    @classmethod
+    def columnsOf(cls, array, headers: list):
+        '''
+        inputs: 2D parsed array, column headers
+        outputs: dictionary of column header to column of the array
+
+        The goal of this function is to name the columns of a parsed array without copying them.
+        '''
+        return {header: array[:, i] for i, header in enumerate(headers)}
+
     def parseVizInfo(self, damagerow, num_frames = 1200):
         '''
         inputs: none
-        outputs: dataframes of dimensions, chromosomeInfo, damageInfo, cause
+        outputs: dictionaries of column arrays for dimensions, chromosomeInfo, damageInfo, cause, breakSpecs, times
         
         The goal of this function is is to extract plotting specific information for visualization.
+        Every section is parsed straight into a preallocated array; saveParsed casts the columns to parsedSchema.
         '''
         # each try and except below is in case the column does not exist
         try:
-            dimensions = [] # instantiating dimensions list
-            for row in self.extractCol("xyz"): # iterating through rows of the coordinate columns
-                temp = [] # temporary list to store values from each row
-                if '/' in row:
-                    try:
-                        for l in SDDReport.splitBoth(str(row), type(0.0), secondSplit=','): # split values into floats
-                            temp += l # extend temp list with values from row
-                        dimensions.append(temp) # append values from row
-                    except:
-                        for l in SDDReport.splitBoth(str(row), type(0.0), secondSplit=' '): # split values into floats
-                            temp += l # extend temp list with values from row
-                        dimensions.append(temp) # append values from row
-                else:
-                    try:
-                        temp = SDDReport.splitAny(str(row), type(0.0), ",") # split values into floats
-                    except:
-                        temp = SDDReport.splitAny(str(row), type(0.0), " ") # split values into floats
-                    dimensions.append(temp) # append values from row
-            length = len(dimensions[0]) # determine the number of columns (center, max, min)
-            dimensions = pd.DataFrame(np.array(dimensions), columns=SDDReport.dimensionsHeaders[0:length]) # assign appropriate parsed column headers
+            dimensions = SDDReport.fillArray(self.extractCol("xyz"), SDDReport.splitPositions, np.float64) # center, max and min coordinates as floats
+            length = dimensions.shape[1] # determine the number of columns (center, max, min)
+            dimensions = SDDReport.columnsOf(dimensions, SDDReport.dimensionsHeaders[0:length]) # assign appropriate parsed column headers
         except ValueError:
             print("Either no positional information or missing extent of damage.")
+            dimensions = {}
 
         try:
-            chromosomeInfo = [] # instantiating chromosomeInfo list
-            for row2 in self.extractCol("chromosomeid"): # iterating through rows of the chromosomeID columns
-                try:
-                    chromosomeInfo.append(SDDReport.splitAny(str(row2), type(0), ",")) # split values into ints
-                except:
-                    chromosomeInfo.append(SDDReport.splitAny(str(row2), type(0), " ")) # split values into ints
-            chromosomeInfo = pd.DataFrame(np.array(chromosomeInfo), columns=SDDReport.chromosomeInfoHeaders) # assign appropriate parsed column headers
+            chromosomeInfo = SDDReport.fillArray(self.extractCol("chromosomeid"), lambda row: SDDReport.splitRow(row, type(0)), np.int32) # split values into ints
+            chromosomeInfo = SDDReport.columnsOf(chromosomeInfo, SDDReport.chromosomeInfoHeaders) # assign appropriate parsed column headers
         except:
             print("There is no chromosome information column in this file. Skipping...")
-            chromosomeInfo = pd.DataFrame()
+            chromosomeInfo = {}
 
         try:
-            breakSpecs = [] # instantiating damageInfo list
-            for row5 in self.extractCol("breakspec"): # iterating through rows of the damageInfo columns
+            breakSpecs = np.empty((len(self.originalDF.index), 7), dtype=np.int32, order="F") # instantiating breakSpecs array
+            for r, row5 in enumerate(self.extractCol("breakspec")): # iterating through rows of the damageInfo columns
                 indirect = 0
                 direct = 0
                 indirectNDirect = 0
@@ -239,46 +369,41 @@ class SDDReport:
                 except:
                     pass
 
-                tempDF = pd.DataFrame(np.array(temp), columns=SDDReport.breakSpecsHeaders)
+                temp = np.array(temp, dtype=np.int64) # columns are strand, base, identifier
+                strand, base, ids = temp[:, 0], temp[:, 1], temp[:, 2]
+                damaged = ids != 0
 
-                singleNumber = len(tempDF[((tempDF["strand"] == 1) | (tempDF["strand"] == 4)) & (tempDF["identifier"] != 0)]["strand"])
-                baseNumber = len(tempDF[((tempDF["strand"] == 2) | (tempDF["strand"] == 3)) & (tempDF["identifier"] != 0)]["base"])
+                singleNumber = int(np.count_nonzero(((strand == 1) | (strand == 4)) & damaged))
+                baseNumber = int(np.count_nonzero(((strand == 2) | (strand == 3)) & damaged))
                 
-                if len(tempDF["identifier"].unique()) == 1:
-                    identifier = tempDF["identifier"].unique()[0]
+                uniqueIds = np.unique(ids)
+                if len(uniqueIds) == 1:
+                    identifier = uniqueIds[0]
                     if identifier == 1:
                         direct += 1
                     if identifier == 2:
                         indirect += 1
                     if identifier == 3:
                         indirectNDirect += 1
-                elif 1 in tempDF["identifier"].unique() and 2 in tempDF["identifier"].unique():
+                elif 1 in uniqueIds and 2 in uniqueIds:
                     identifier = 3
-                    direct += len(tempDF[tempDF["identifier"] == 1])
-                    indirect += len(tempDF[tempDF["identifier"] == 2])
-                    indirectNDirect += len(tempDF[tempDF["identifier"] == 3])
+                    direct += np.count_nonzero(ids == 1)
+                    indirect += np.count_nonzero(ids == 2)
+                    indirectNDirect += np.count_nonzero(ids == 3)
                 else:
-                    identifier = max(tempDF["identifier"].unique())
-                    direct += len(tempDF[tempDF["identifier"] == 1])
-                    indirect += len(tempDF[tempDF["identifier"] == 2])
-                    indirectNDirect += len(tempDF[tempDF["identifier"] == 3])
+                    identifier = max(uniqueIds)
+                    direct += np.count_nonzero(ids == 1)
+                    indirect += np.count_nonzero(ids == 2)
+                    indirectNDirect += np.count_nonzero(ids == 3)
 
                 if damagerow != None and int(damagerow[1]) == 0:
                     bps = float(damagerow[2])
-                    strand1 = list(tempDF[(tempDF["strand"] == 1) & (tempDF["identifier"] != 0)]["base"])
-                    strand4 = list(tempDF[(tempDF["strand"] == 4) & (tempDF["identifier"] != 0)]["base"])
-                    strand2 = list(tempDF[(tempDF["strand"] == 2) & (tempDF["identifier"] != 0)]["base"])
-                    strand3 = list(tempDF[(tempDF["strand"] == 3) & (tempDF["identifier"] != 0)]["base"])
-                    strand1.extend(strand2)
-                    strand3.extend(strand4)
-                    distances = []
-                    
-                    for base in strand1:
-                        differences = np.array(strand3) - base
-                        distances.extend(differences)
+                    strand1 = base[((strand == 1) | (strand == 2)) & damaged] # strand 1 backbone and bases
+                    strand3 = base[((strand == 3) | (strand == 4)) & damaged] # strand 2 backbone and bases
                     
-                    if len(distances) != 0:
-                        if min(distances) <= bps:
+                    if len(strand1) != 0 and len(strand3) != 0:
+                        distances = np.subtract.outer(strand3, strand1) # every distance between damage on opposite strands
+                        if distances.min() <= bps:
                             present = 1
                         else:
                             present = 0
@@ -287,97 +412,326 @@ class SDDReport:
                 else:
                     pass
 
-                breakSpecs.append([baseNumber, singleNumber, identifier, direct, indirect, indirectNDirect, present])
-            breakSpecs = pd.DataFrame(np.array(breakSpecs), columns=["numBases", "singleNumber", "identifier", "direct", "indirect", "directNIndirect", "dsbPresent"])
-            if sum(breakSpecs["dsbPresent"] < 0):
-                breakSpecs.drop(columns=["dsbPresent"], inplace=True)
+                breakSpecs[r] = [baseNumber, singleNumber, identifier, direct, indirect, indirectNDirect, present]
+            breakSpecs = SDDReport.columnsOf(breakSpecs, ["numBases", "singleNumber", "identifier", "direct", "indirect", "directNIndirect", "dsbPresent"])
+            if np.any(breakSpecs["dsbPresent"] < 0):
+                del breakSpecs["dsbPresent"]
         except:
             print("There is no break specification information column in this file. Skipping...")
-            breakSpecs = pd.DataFrame()
+            breakSpecs = {}
 
         try:
-            if len(list(breakSpecs.columns)) == 0:
-                damageInfo = [] # instantiating damageInfo list
-                for row3 in self.extractCol("damage"): # iterating through rows of the damageInfo columns
-                    try:
-                        damageInfo.append(SDDReport.splitAny(str(row3), type(0), ",")) # split values into ints
-                    except:
-                        damageInfo.append(SDDReport.splitAny(str(row3), type(0), " ")) # split values into ints
-                length = len(damageInfo[0])
-                damageInfo = pd.DataFrame(np.array(damageInfo), columns=SDDReport.damageInfoHeaders[0:length]) # assign appropriate parsed column headers
-            else:
-                damageInfo = [] # instantiating damageInfo list
-                for row3 in self.extractCol("damage"): # iterating through rows of the damageInfo columns
-                    try:
-                        damageInfo.append(SDDReport.splitAny(str(row3), type(0), ",")) # split values into ints
-                    except:
-                        damageInfo.append(SDDReport.splitAny(str(row3), type(0), " ")) # split values into ints
-                length = len(damageInfo[0])
-                damageInfo = pd.DataFrame(np.array(damageInfo), columns=SDDReport.damageInfoHeaders[0:length]) # assign appropriate parsed column headers
-                damageInfo = pd.DataFrame(damageInfo["dsbPresent"])
-                if "dsbPresent" in list(breakSpecs.columns):
-                    breakSpecs.drop(columns=["dsbPresent"], inplace=True)
+            damageInfo = SDDReport.fillArray(self.extractCol("damage"), lambda row: SDDReport.splitRow(row, type(0)), np.int32) # split values into ints
+            length = damageInfo.shape[1]
+            damageInfo = SDDReport.columnsOf(damageInfo, SDDReport.damageInfoHeaders[0:length]) # assign appropriate parsed column headers
+            if len(breakSpecs) != 0: # break specifications already counted the damages so only keep dsbPresent
+                damageInfo = {"dsbPresent": damageInfo["dsbPresent"]}
+                if "dsbPresent" in breakSpecs:
+                    del breakSpecs["dsbPresent"]
         except:
             print("There is no damage information column in this file. Skipping...")
-            damageInfo = pd.DataFrame()
+            damageInfo = {}
             
         try:
-            cause = [] # instantiating cause list
-            for row4 in self.extractCol("cause"): # iterating through rows of then cause columns
-                try:
-                    cause.append(SDDReport.splitAny(str(row4), type(0), ",")) # split values into ints
-                except:
-                    cause.append(SDDReport.splitAny(str(row4), type(0), " ")) # split values into ints
-            length = len(cause[0])
+            cause = SDDReport.fillArray(self.extractCol("cause"), lambda row: SDDReport.splitRow(row, type(0)), np.int32) # split values into ints
+            length = cause.shape[1]
             if length == 1:
-                cause = pd.DataFrame(np.array(cause), columns=["cause"])
+                cause = SDDReport.columnsOf(cause, ["cause"])
             else:
-                cause = pd.DataFrame(np.array(cause), columns=SDDReport.causeHeaders[0:length]) # assign appropriate parsed column headers
-            if "identifier" in list(breakSpecs.columns) and "identifier" in list(cause.columns):
-                cause.drop(columns=["identifier"], inplace = True)
-            elif "identifier" not in list(breakSpecs.columns) and "identifier" in list(cause.columns):
+                cause = SDDReport.columnsOf(cause, SDDReport.causeHeaders[0:length]) # assign appropriate parsed column headers
+            if "identifier" in breakSpecs and "identifier" in cause:
+                del cause["identifier"]
+            elif "identifier" not in breakSpecs and "identifier" in cause:
                 cause["identifier"] = cause["identifier"] + 1
-            if "direct" in breakSpecs.columns:
-                cause.drop(columns=["direct"], inplace=True)
-            if "indirect" in breakSpecs.columns:
-                cause.drop(columns=["indirect"], inplace=True)
+            if "direct" in breakSpecs:
+                del cause["direct"]
+            if "indirect" in breakSpecs:
+                del cause["indirect"]
         except:
             print("There is no cause information column in this file. Skipping...")
-            cause = pd.DataFrame()
+            cause = {}
 
         # add lesion time parsing
         try:
-            times = []
-            for row6 in self.extractCol("lesiontime"):
-                times.append(float(float(row6)))
+            times = self.extractCol("lesiontime").to_numpy(dtype=np.float64).reshape(-1, 1)
             scaler = MinMaxScaler(feature_range=(1, num_frames))
-            scaledtimes = scaler.fit_transform(pd.DataFrame(np.array(times), columns=["lesiontimes"]))
-            times = pd.DataFrame(scaledtimes, columns=["lesiontimes"])
+            scaledtimes = scaler.fit_transform(pd.DataFrame(times, columns=["lesiontimes"]))
+            self.lesionTimes = times[:, 0] # unscaled times so the scaling can be fit again when rows are appended
+            times = {"lesiontimes": scaledtimes[:, 0]}
             self.timescaler = scaler
         except:
             print("There is no cause information column in this file. Skipping...")
-            times = pd.DataFrame()
+            self.lesionTimes = None
+            times = {}
 
         return dimensions, chromosomeInfo, damageInfo, cause, breakSpecs, times
 
-    def saveParsed(self, df1: pd.DataFrame, *dfs: pd.DataFrame, path: str = None):
+    def saveParsed(self, df1, *dfs, path: str = None):
         '''
-        inputs: single or and number of dataframes, path to output path (optional)
+        inputs: single or and number of dataframes or dictionaries of columns, path to output path (optional)
         outputs: final dataframe returned
         
         The goal of this function is to combine the parsed columns needed for the final visualization.
+        The columns are gathered once and cast to parsedSchema so the final dataframe is built in one step instead of a join per section.
         '''
 
-        finaldf = df1 # set the single dataframe
+        columns = {} # column header to column of the final dataframe
+        for df in (df1,) + dfs: # iterating through each section
+            for name in df: # dataframes and dictionaries both iterate over their column headers
+                columns[name] = np.asarray(df[name])
+
+        if "numBases" in columns and "singleNumber" in columns:
+            columns["totalDamages"] = columns["numBases"] + columns["singleNumber"]
 
-        for df in dfs: # iterating through each dataframe in the list
-            finaldf = finaldf.join(df) # join the dataframe columns into one big dataframe
+        for name in columns: # cast each column to its compact type
+            if name in SDDReport.parsedSchema:
+                columns[name] = columns[name].astype(SDDReport.parsedSchema[name], copy=False)
 
-        if "numBases" and "singleNumber" in finaldf.columns:
-            finaldf["totalDamages"] = finaldf["numBases"] + finaldf["singleNumber"]
+        finaldf = pd.DataFrame(columns) # single dataframe from the typed columns
+        self.parsedStats = SDDReport.columnStats(finaldf) # summaries so later stages do not rescan the columns
+        finaldf.attrs["stats"] = self.parsedStats # carried along by copies and row selections of the dataframe
 
         self.parsedDf = finaldf # set parsedDF as an value of the object
         if path != None: # if path is None then does not save to a file otherwise saves to path
-            finaldf.to_csv(os.path.join(path, 'parsedSDD.csv')) # saves to path
+            self.writeParsed(path)
 
         return finaldf
+
+    def writeParsed(self, path: str):
+        '''
+        inputs: output path
+        outputs: None; parsed sdd and its statistics saved to path
+        '''
+        self.parsedDf.to_csv(os.path.join(path, 'parsedSDD.csv')) # saves to path
+        with open(os.path.join(path, 'parsedStats.json'), "w") as file: # statistics saved next to the parsed sdd
+            json.dump(self.parsedStats, file)
+
+    def appendParsed(self, report, num_frames = 1200):
+        '''
+        inputs: report of the lines written to the sdd after the lines of this report, number of frames
+        outputs: None; parsed dataframe, statistics and lesion time scaling of this report cover the lines of both
+
+        The goal of this function is to parse only newly appended lines and merge them into the rows already parsed.
+        '''
+        newdf = report.saveParsed(*report.parseVizInfo(self.damages, num_frames)) # only the new lines are parsed
+        if len(self.parsedDf.columns) == 0: # no rows parsed before so the new lines are the whole parse
+            self.parsedDf, self.parsedStats, self.lesionTimes, self.dataEnd = newdf, report.parsedStats, report.lesionTimes, report.dataEnd
+            if report.lesionTimes is not None:
+                self.timescaler = report.timescaler
+            return
+        if list(newdf.columns) != list(self.parsedDf.columns):
+            raise ValueError("Appended lines do not have the same columns as the lines parsed before them.")
+
+        finaldf = pd.concat([self.parsedDf, newdf], ignore_index=True)
+        self.parsedStats = SDDReport.mergeStats(self.parsedStats, report.parsedStats, finaldf, len(newdf.index))
+        finaldf.attrs["stats"] = self.parsedStats
+        self.parsedDf = finaldf
+        self.dataEnd = report.dataEnd
+        if self.lesionTimes is not None: # lesion times of new damage usually extend the last time so fit the scaling to every row again
+            self.lesionTimes = np.concatenate([self.lesionTimes, report.lesionTimes])
+            self.rescaleTimes(num_frames)
+
+    def rescaleTimes(self, num_frames = 1200):
+        '''
+        inputs: number of frames
+        outputs: None; lesion times, their scaler and their statistics are updated
+
+        The goal of this function is to fit the lesion time scaling to the unscaled times of every parsed row.
+        '''
+        scaler = MinMaxScaler(feature_range=(1, num_frames))
+        scaledtimes = scaler.fit_transform(pd.DataFrame(self.lesionTimes.reshape(-1, 1), columns=["lesiontimes"]))
+        self.parsedDf["lesiontimes"] = scaledtimes[:, 0].astype(SDDReport.parsedSchema["lesiontimes"])
+        self.timescaler = scaler
+        stats = {name: column for name, column in self.parsedStats.items() if name != "lesiontimes"} # statistics of the old scaling no longer apply
+        stats.update(SDDReport.columnStats(self.parsedDf[["lesiontimes"]]))
+        self.parsedStats = {name: stats[name] for name in self.parsedDf.columns if name in stats} # same order as the columns
+        self.parsedDf.attrs["stats"] = self.parsedStats
+
+    @classmethod
+    def columnStats(cls, df: pd.DataFrame, bins: int = 32):
+        '''
+        inputs: parsed dataframe, number of histogram bins
+        outputs: dictionary of column header to min, max, histogram and, for integer columns, the distinct values and their counts
+        
+        The goal of this function is to summarize every numeric column in one pass so filtering and labelling can read the summary instead of the column.
+        Distinct values are only kept for integer columns spanning fewer than statsDistinctLimit values; continuous columns only keep min, max and histogram.
+        '''
+        stats = {}
+        for name in df.columns:
+            values = df[name].to_numpy()
+            if not np.issubdtype(values.dtype, np.number): # labels and other text columns are skipped
+                continue
+            if np.issubdtype(values.dtype, np.floating):
+                values = values[np.isfinite(values)]
+            if len(values) == 0:
+                continue
+
+            low, high = values.min(), values.max()
+            column = {"min": low.item(), "max": high.item(), "histogram": SDDReport.histogramOf(values, low, high, bins), "values": None, "counts": None}
+            if np.issubdtype(values.dtype, np.integer) and int(high) - int(low) < cls.statsDistinctLimit:
+                valueCounts = np.bincount(values.astype(np.int64) - int(low)) # counting the values instead of sorting them
+                present = np.nonzero(valueCounts)[0]
+                column["values"] = (present + int(low)).tolist()
+                column["counts"] = valueCounts[present].tolist()
+            stats[name] = column
+        return stats
+
+    @classmethod
+    def histogramOf(cls, values, low, high, bins: int = 32):
+        '''
+        inputs: column values, minimum and maximum of the column, number of histogram bins
+        outputs: histogram counts and bin edges as lists
+
+        The goal of this function is to bin values the same way whether a column is summarized whole or merged.
+        '''
+        if np.issubdtype(values.dtype, np.floating):
+            values = values[np.isfinite(values)]
+        counts, edges = np.histogram(values, bins=bins, range=(float(low), float(high)) if low < high else (float(low) - 0.5, float(high) + 0.5))
+        return [counts.tolist(), edges.tolist()]
+
+    @classmethod
+    def mergeStats(cls, stats: dict, newStats: dict, df: pd.DataFrame, newRows: int, bins: int = 32):
+        '''
+        inputs: statistics of the rows parsed before, statistics of the appended rows, dataframe of both with the appended rows last, number of appended rows, number of histogram bins
+        outputs: statistics of every row
+
+        The goal of this function is to combine column summaries without summarizing the old rows again.
+        Histograms whose range is unchanged only bin the appended rows; a column whose range grew is binned again since its bin edges moved.
+        '''
+        merged = {}
+        for name in set(stats) | set(newStats):
+            if name not in newStats or name not in stats: # no finite values on one side so the other side already covers the column
+                merged[name] = stats[name] if name in stats else newStats[name]
+                continue
+            old, new = stats[name], newStats[name]
+            low, high = min(old["min"], new["min"]), max(old["max"], new["max"])
+            column = {"min": low, "max": high, "histogram": None, "values": None, "counts": None}
+
+            values = df[name].to_numpy()
+            if low == old["min"] and high == old["max"]: # same bin edges so only the appended rows are binned
+                counts, edges = SDDReport.histogramOf(values[len(values) - newRows:], low, high, bins)
+                column["histogram"] = [np.add(old["histogram"][0], counts).tolist(), old["histogram"][1]]
+            else:
+                column["histogram"] = SDDReport.histogramOf(values, low, high, bins)
+
+            if old["values"] != None and new["values"] != None and int(high) - int(low) < cls.statsDistinctLimit:
+                counts = dict(zip(old["values"], old["counts"]))
+                for value, count in zip(new["values"], new["counts"]):
+                    counts[value] = counts.get(value, 0) + count
+                column["values"] = sorted(counts)
+                column["counts"] = [counts[value] for value in column["values"]]
+            merged[name] = column
+        return {name: merged[name] for name in df.columns if name in merged} # same order as the columns
+
+    @classmethod
+    def completeEnd(cls, path: str):
+        '''
+        inputs: path to sdd
+        outputs: byte offset just after the last complete line
+
+        The goal of this function is to find where the finished lines of a file end, since a running simulation may be partway through writing its last line.
+        '''
+        with open(path, "rb") as file:
+            size = file.seek(0, os.SEEK_END)
+            position = size
+            while position > 0: # searching backwards from the end for the last newline
+                step = min(position, 1 << 16)
+                file.seek(position - step)
+                chunk = file.read(step)
+                newline = chunk.rfind(b"\n")
+                if newline != -1:
+                    return size if chunk[newline + 1:].strip() == b"" else position - step + newline + 1 # only whitespace after the newline means the file is complete
+                position -= step
+        return 0
+
+    @classmethod
+    def fingerprint(cls, path: str, dataOffset: int, end: int):
+        '''
+        inputs: path to sdd, byte offset of the first data line, byte offset of the end of the parsed lines
+        outputs: sha1 hash of the header and the last parsed lines
+
+        The goal of this function is to recognize a file that only had lines appended since it was parsed.
+        '''
+        digest = hashlib.sha1()
+        with open(path, "rb") as file:
+            digest.update(file.read(dataOffset)) # header
+            start = max(dataOffset, end - 4096) # last parsed lines
+            file.seek(start)
+            digest.update(file.read(end - start))
+        return digest.hexdigest()
+
+    def saveState(self, statePath: str):
+        '''
+        inputs: path to save the parsed state to
+        outputs: None; parsed rows, statistics, lesion times and the end of the parsed lines are pickled
+
+        The goal of this function is to keep everything a later run needs to parse only the lines appended after this one.
+        '''
+        state = dict(self.__dict__)
+        state["originalDF"] = None # unparsed columns are not needed again
+        state["fingerprint"] = SDDReport.fingerprint(self.path, self.headerInfo.dataOffset, self.dataEnd)
+        with open(statePath, "wb") as file:
+            pickle.dump(state, file)
+
+    @classmethod
+    def loadState(cls, sddPath: str, statePath: str):
+        '''
+        inputs: path to sdd, path of a saved parsed state
+        outputs: report with the saved parsed rows, or None if there is no state or the file changed other than by appending
+
+        The goal of this function is to reuse an earlier parse of the same file.
+        '''
+        if not os.path.isfile(statePath):
+            return None
+        with open(statePath, "rb") as file:
+            state = pickle.load(file)
+        if os.path.abspath(state["path"]) != os.path.abspath(sddPath) or os.path.getsize(sddPath) < state["dataEnd"]:
+            return None
+        if SDDReport.fingerprint(sddPath, state["headerInfo"].dataOffset, state["dataEnd"]) != state.pop("fingerprint"):
+            return None
+        report = cls.__new__(cls)
+        report.__dict__.update(state)
+        report.path = sddPath
+        return report
+
+    @classmethod
+    def openIncremental(cls, sddPath: str, statePath: str, num_frames = 1200, path: str = None):
+        '''
+        inputs: path to sdd, path of the parsed state, number of frames, optional output path for the parsed sdd
+        outputs: report whose parsed dataframe covers the whole file
+
+        The goal of this function is to refresh the parse of an sdd that a running simulation is still appending to by parsing only the lines added since the last run.
+        The state only covers complete lines; an unfinished last line is parsed on every run but not saved until it is complete.
+        '''
+        end = max(SDDReport.completeEnd(sddPath), SDDHeader(sddPath).dataOffset)
+        report = SDDReport.loadState(sddPath, statePath)
+        if report == None: # nothing usable saved so parse every complete line
+            print("No saved parse of this file. Parsing every line...")
+            report = cls(sddPath, end=end)
+            if len(report.originalDF.index) == 0: # only the header so far; rows are parsed once they are appended
+                report.parsedDf, report.parsedStats, report.lesionTimes = pd.DataFrame(), {}, None
+            else:
+                report.saveParsed(*report.parseVizInfo(report.damages, num_frames))
+        else:
+            cached = len(report.parsedDf.index)
+            appended = cls(sddPath, start=report.dataEnd, end=end) if end > report.dataEnd else None
+            if appended != None and len(appended.originalDF.index) != 0:
+                report.appendParsed(appended, num_frames)
+            else:
+                if appended != None: # only blank lines were appended
+                    report.dataEnd = end
+                if report.lesionTimes is not None:
+                    report.rescaleTimes(num_frames) # number of frames may differ from the last run
+            print(f"Reused {cached} parsed rows and parsed {len(report.parsedDf.index) - cached} appended rows.")
+        report.saveState(statePath)
+
+        if os.path.getsize(sddPath) > end: # unfinished last line
+            try:
+                unfinished = cls(sddPath, start=end)
+                if len(unfinished.originalDF.index) != 0:
+                    report.appendParsed(unfinished, num_frames)
+            except ValueError:
+                print("The last line of the sdd is not complete yet. Skipping it...")
+        if path != None:
+            report.writeParsed(path)
+        return report
@@ -0,0 +1,181 @@
+# imports
+import pandas as pd
+import numpy as np
+import matplotlib.colors as mcolors
+import cv2
+
+def cameraMatrix(elevation: float, azimuth: float):
+  '''
+  inputs: elevation and azimuth of the camera in degrees (same meaning as matplotlib view_init)
+  outputs: 3x3 matrix whose rows are the screen right, screen up and toward the viewer directions
+
+  The goal of this function is to build the rotation that takes scaled xyz positions into camera coordinates.
+  '''
+  el, az = np.radians(elevation), np.radians(azimuth)
+  toward = np.array([np.cos(el) * np.cos(az), np.cos(el) * np.sin(az), np.sin(el)]) # from the origin to the camera
+  right = np.array([-np.sin(az), np.cos(az), 0.0])
+  up = np.cross(toward, right)
+  return np.stack([right, up, toward])
+
+def bgrPalette():
+  '''
+  inputs: none
+  outputs: array of the matplotlib named colors as BGR bytes, in the same order as the video frames
+
+  The goal of this function is to give the raster frames the same colors as the matplotlib frames.
+  '''
+  return np.array([[int(round(255 * c)) for c in mcolors.to_rgb(color)][::-1] for color in sorted(list(mcolors.CSS4_COLORS))], dtype=np.uint8)
+
+class Rasterizer:
+  '''
+  inputs: scale of the scaled positions, image width and height in pixels, optional (elevation, azimuth) angle
+
+  The goal of this object is to draw damage centers straight into an image array with a NumPy camera instead of matplotlib mplot3d.
+  Points are projected orthographically and splatted as discs; where discs overlap the point nearest the camera wins the pixel.
+  '''
+  def __init__(self, extent: float, width: int = 640, height: int = 480, angle_tup: tuple = None):
+
+    elevation, azimuth = angle_tup if angle_tup != None else (30, -60) # matplotlib default view
+    self.camera = cameraMatrix(elevation, azimuth)
+    self.width, self.height = width, height
+    halfWidth, halfHeight = extent * np.abs(self.camera[:2]).sum(axis=1) # half size of the scaled cube as seen by the camera
+    self.pixelsPerUnit = 0.95 * min(width / (2 * halfWidth), height / (2 * halfHeight)) # fit the cube to the image
+    self.background = np.full((height, width, 3), 255, dtype=np.uint8) # white
+    self.nucleus = None # outline of the nucleus in pixels
+    self.stencils = {} # pixel offsets of a disc by radius
+    self.padding = 8 # depth buffer border so discs near the edge need no bounds checks; radii above this are clipped
+
+  def project(self, xyz: np.ndarray):
+    '''
+    inputs: n x 3 array of scaled positions
+    outputs: pixel columns, pixel rows and depth (bigger is nearer the camera)
+
+    The goal of this function is to put positions into image coordinates with the camera matrix.
+    '''
+    view = np.asarray(xyz, dtype=np.float32) @ self.camera.T.astype(np.float32) # right, up, toward the viewer
+    cols = np.rint(self.width / 2 + view[:, 0] * self.pixelsPerUnit).astype(np.int32)
+    rows = np.rint(self.height / 2 - view[:, 1] * self.pixelsPerUnit).astype(np.int32) # image rows go down
+    return cols, rows, view[:, 2]
+
+  def stencil(self, radius: int):
+    '''
+    inputs: disc radius in pixels
+    outputs: offsets of every pixel in the disc within the padded depth buffer
+    '''
+    if radius not in self.stencils:
+      dy, dx = np.mgrid[-radius:radius + 1, -radius:radius + 1]
+      inside = dx * dx + dy * dy <= radius * radius
+      self.stencils[radius] = (dy[inside] * (self.width + 2 * self.padding) + dx[inside]).astype(np.int32)
+    return self.stencils[radius]
+
+  def setNucleus(self, volumes: list):
+    '''
+    inputs: scaled nucleus volume
+    outputs: None; outline is stored and drawn on every frame
+
+    The goal of this function is to find the outline of the ellipsoid nucleus as seen by the camera, with the same radii as draw.graphNucleus.
+    Seen from any direction an ellipsoid outline is an ellipse, whose shape comes from projecting the ellipsoid's radii onto the screen.
+    '''
+    if len(volumes) == 7 and int(volumes[0]) == 1:
+      radii = np.array([abs(volumes[1] - volumes[4]), abs(volumes[2] - volumes[5]), abs(volumes[3] - volumes[6])])
+      screen = self.camera[:2] # right and up directions
+      spread, axes = np.linalg.eigh(screen @ np.diag(radii ** 2) @ screen.T) # outline axes and squared half lengths; a flat nucleus seen edge on has a zero one
+      shape = axes @ np.diag(np.sqrt(np.clip(spread, 0, None))) # 2x2 matrix taking the unit circle onto the outline
+      t = np.linspace(0, 2 * np.pi, 128, endpoint=False)
+      outline = shape @ np.stack([np.cos(t), np.sin(t)])
+      self.nucleus = np.stack([self.width / 2 + outline[0] * self.pixelsPerUnit, self.height / 2 - outline[1] * self.pixelsPerUnit], axis=1).round().astype(np.int32)
+
+  def legend(self, names: list, colors: np.ndarray):
+    '''
+    inputs: label names, BGR color of each label
+    outputs: legend image and the column and row of its top left corner in the frame
+
+    The goal of this function is to draw the legend once so every frame only has to copy it in.
+    '''
+    font, scale, line = cv2.FONT_HERSHEY_SIMPLEX, 0.3, 10
+    perColumn = max(1, (self.height - 10) // line)
+    columns = [names[i:i + perColumn] for i in range(0, len(names), perColumn)]
+    widths = [max(cv2.getTextSize(name, font, scale, 1)[0][0] for name in column) + 16 for column in columns]
+    patch = np.full((min(len(names), perColumn) * line + 6, sum(widths) + 4, 3), 255, dtype=np.uint8)
+    cv2.rectangle(patch, (0, 0), (patch.shape[1] - 1, patch.shape[0] - 1), (204, 204, 204), 1) # light border
+    x = 4
+    for c, column in enumerate(columns):
+      for r, name in enumerate(column):
+        color = colors[c * perColumn + r]
+        y = 3 + r * line + line // 2
+        cv2.circle(patch, (x + 4, y), 3, tuple(int(v) for v in color), -1)
+        cv2.putText(patch, name, (x + 11, y + 3), font, scale, (0, 0, 0), 1, cv2.LINE_AA)
+      x += widths[c]
+    return patch, (max(0, self.width - patch.shape[1] - 4), 4)
+
+  def render(self, cols: np.ndarray, rows: np.ndarray, ranks: np.ndarray, radii: np.ndarray, rankColors: np.ndarray, legend: tuple = None, title: str = None):
+    '''
+    inputs: projected pixel columns and rows, depth rank of each point (higher is nearer), disc radius of each point, BGR color by depth rank, optional legend and title
+    outputs: image array (height x width x 3, BGR) ready for cv2.VideoWriter or cv2.imwrite
+
+    The goal of this function is to splat the points into a depth buffer and color each pixel by its nearest point.
+    '''
+    radii = np.minimum(radii, self.padding)
+    visible = (cols >= -radii) & (cols < self.width + radii) & (rows >= -radii) & (rows < self.height + radii) # any part of the disc on screen
+    paddedWidth = self.width + 2 * self.padding
+    centers = (rows + self.padding) * paddedWidth + cols + self.padding # flat position in the padded depth buffer
+
+    if not visible.any():
+      frame = self.background.copy()
+    else:
+      depth = np.full(paddedWidth * (self.height + 2 * self.padding), -1, dtype=np.int32) # rank of the nearest point on each pixel
+      for radius in np.flatnonzero(np.bincount(radii[visible])): # same disc for every point of a radius
+        members = np.nonzero(visible & (radii == radius))[0]
+        memberCenters, memberRanks = centers[members], ranks[members]
+        for offset in self.stencil(int(radius)): # keep the nearest rank on every pixel the disc covers
+          np.maximum.at(depth, memberCenters + offset, memberRanks)
+      depth = depth.reshape(-1, paddedWidth)[self.padding:-self.padding, self.padding:-self.padding] # back to the image
+      table = np.full((len(rankColors) + 1, 4), 255, dtype=np.uint8) # one packed BGRA color per rank and the background last so rank -1 picks it
+      table[:-1, :3] = rankColors
+      frame = cv2.cvtColor(np.take(table.view(np.uint32).ravel(), depth).view(np.uint8).reshape(self.height, self.width, 4), cv2.COLOR_BGRA2BGR)
+
+    if self.nucleus is not None:
+      cv2.polylines(frame, [self.nucleus], True, (191, 0, 191), 1, cv2.LINE_AA) # magenta like the matplotlib nucleus
+    if legend != None:
+      patch, (x, y) = legend
+      frame[y:y + patch.shape[0], x:x + patch.shape[1]] = patch[:self.height - y, :self.width - x]
+    if title != None:
+      (textWidth, textHeight), baseline = cv2.getTextSize(title, cv2.FONT_HERSHEY_SIMPLEX, 0.45, 1)
+      cv2.putText(frame, title, ((self.width - textWidth) // 2, textHeight + 6), cv2.FONT_HERSHEY_SIMPLEX, 0.45, (0, 0, 0), 1, cv2.LINE_AA)
+    return frame
+
+class RasterScene:
+  '''
+  inputs: dataframe to plot (sizes from draw.scaleSizes when size is set), list to color coordinate data by, unique values of each label column, scaled nucleus volume, flag to modulate size, scale of the scaled positions, optional angle, image width and height
+
+  The goal of this object is to do everything that does not change between frames once: projection, depth order, colors and legends.
+  A frame is then drawn from a slice of rows, e.g. the rows of draw.frameRows on a dataframe from draw.bucketFrames.
+  '''
+  def __init__(self, df: pd.DataFrame, labelCoordinateList: list, uniqueVals: dict, volumes: list, size: bool, extent: float, angle_tup: tuple = None, width: int = 640, height: int = 480):
+
+    self.rasterizer = Rasterizer(extent, width, height, angle_tup)
+    self.rasterizer.setNucleus(volumes)
+    self.cols, self.rows, depth = self.rasterizer.project(df[['xcenter', 'ycenter', 'zcenter']].to_numpy(dtype=np.float32))
+    order = np.argsort(depth, kind="stable") # far to near
+    self.ranks = np.empty(len(order), dtype=np.int32)
+    self.ranks[order] = np.arange(len(order), dtype=np.int32) # camera is fixed so the depth order is found once
+
+    if "totalDamages" in df.columns and size: # if direct and indirect (changing size of damage on plot since basically the number of damages)
+      self.radii = np.floor(df["totalDamages"].to_numpy(dtype=float) / 2).astype(np.int32) # scaled sizes 1 to 5 become 0 to 2 pixel radii
+    else: # same size for all points
+      self.radii = np.ones(len(df.index), dtype=np.int32)
+
+    palette = bgrPalette()
+    self.rankColors = {None: np.zeros((len(order), 3), dtype=np.uint8)} # unlabelled points are black
+    self.legends = {None: None}
+    for key in labelCoordinateList:
+      codes = pd.Index(uniqueVals[key]).get_indexer(df[key]) # position of each value among the unique values
+      self.rankColors[key] = palette[codes % len(palette)][order]
+      self.legends[key] = self.rasterizer.legend([str(value) for value in uniqueVals[key]], palette[np.arange(len(uniqueVals[key])) % len(palette)])
+
+  def frame(self, first: int, last: int, key: str = None, title: str = None):
+    '''
+    inputs: first and last row to draw, column to color coordinate by (None for unlabelled), optional title
+    outputs: image array (height x width x 3, BGR)
+    '''
+    return self.rasterizer.render(self.cols[first:last], self.rows[first:last], self.ranks[first:last], self.radii[first:last], self.rankColors[key], self.legends[key], title)
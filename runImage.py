@@ -1,6 +1,7 @@
 import warnings
 import argparse
 import draw
+import webViewer
 import os
 import pdb
 
@@ -14,6 +15,8 @@ parseIt.add_argument('-c', '--coordinate', help='yaml file with labelling config
 parseIt.add_argument('-s', '--save', help='output folder path', required=False, default='.') # output folder path for png files
 parseIt.add_argument('--size', help='boolean flag to allow for size modulation of damage centroids', required=False, default=False, action=argparse.BooleanOptionalAction)
 parseIt.add_argument('--angle', help='two arguments to change the angle of the image', required=False, nargs=2, type=int, default=None)
+parseIt.add_argument('--html', help='boolean flag to export an interactive html viewer instead of png images', required=False, default=False, action=argparse.BooleanOptionalAction)
+parseIt.add_argument('--incremental', help='boolean flag to only parse lines appended to the sdd since the last run with the same output folder', required=False, default=False, action=argparse.BooleanOptionalAction)
 
 if __name__ == '__main__': # if script run directly
 
@@ -29,15 +32,11 @@ if __name__ == '__main__': # if script run directly
   start = "\033[1;3m"
   end = "\033[0m"
   print(start + "Extracting SDD Information..." + end)
-  df, volumes, obj = draw.openSSD(args.input, outpath=args.save) # original unprocessed dataframe; remains untouched
+  df, volumes, obj = draw.openSSD(args.input, outpath=args.save, incremental=args.incremental) # original unprocessed dataframe; remains untouched
   newdf, sx, sy, sz = draw.scalePositionalData(df, int(args.width), int(args.length)) # scaling the positional data; return new dataframe object in memory
   print()
 
-  nucleusAxes = []
-  if len(volumes) > 7:
-    nucleusAxes = [int(volumes[7]), sx.transform([[volumes[8]]]).item(), sy.transform([[volumes[9]]]).item(), sz.transform([[volumes[10]]]).item(), sx.transform([[volumes[11]]]).item(), sy.transform([[volumes[12]]]).item(), sz.transform([[volumes[13]]]).item()]
-  elif len(volumes) == 7:
-    nucleusAxes = [int(volumes[0]), sx.transform([[volumes[1]]]).item(), sy.transform([[volumes[2]]]).item(), sz.transform([[volumes[3]]]).item(), sx.transform([[volumes[4]]]).item(), sy.transform([[volumes[5]]]).item(), sz.transform([[volumes[6]]]).item()]
+  nucleusAxes = draw.scaleNucleus(volumes, sx, sy, sz) # nucleus on the same scale as the damage centers
 
   if args.filter != None: # ensuring this is inputed, else basic plot
     print(start + "Filtering SDD..." + end)
@@ -53,5 +52,10 @@ if __name__ == '__main__': # if script run directly
   if args.size:
     newdf = draw.scaleSizes(newdf, int(args.width), int(args.length))
 
-  draw.graph(newdf, pb, args.save, nucleusAxes, args.size, args.angle) # create and save plots
-  print(start + "Graphing Successful!" + end)
+  if args.html: # rotation, zoom and labels handled in the browser
+    print(start + "Exporting interactive viewer..." + end)
+    path = webViewer.exportHTML(newdf, pb, args.save, nucleusAxes, args.size, args.angle)
+    print(start + f"Viewer saved to {path}" + end)
+  else:
+    draw.graph(newdf, pb, args.save, nucleusAxes, args.size, args.angle) # create and save plots
+    print(start + "Graphing Successful!" + end)
@@ -0,0 +1,225 @@
+import matplotlib
+matplotlib.use("Agg") # no windows needed to render images for requests
+import draw
+import argparse
+import warnings
+import os
+import io
+import json
+import hashlib
+import threading
+import pandas as pd
+import matplotlib.pyplot as plt
+import matplotlib.colors as mcolors
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor as ppe
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# parser arguments to allow for customized serving
+parseIt = argparse.ArgumentParser() # create argument parser object
+parseIt.add_argument('--host', help='address to listen on', required=False, default='127.0.0.1') # local only by default
+parseIt.add_argument('--port', help='port to listen on', required=False, type=int, default=8765)
+parseIt.add_argument('-p', '--workers', help='number of processes rendering images', required=False, type=int, default=2)
+parseIt.add_argument('--cache', help='number of parsed sdd files to keep in memory', required=False, type=int, default=4)
+
+class DatasetCache:
+  '''
+  inputs: maximum number of parsed sdd files to keep
+
+  The goal of this object is to keep parsed and scaled SDD datasets in memory and drop the least recently used one when full.
+  Datasets are keyed by a hash of the file contents so an edited file is parsed again and a copied file is not.
+  '''
+  def __init__(self, capacity: int):
+
+    self.capacity = capacity
+    self.datasets = OrderedDict() # file hash: parsed dataframe, volumes and scaled versions by (width, length)
+    self.hashes = {} # (path, modified time, size): file hash so an unchanged file is not read again to hash it
+    self.lock = threading.Lock() # requests come in on separate threads; only held to look up and update the dictionaries
+    self.loading = {} # file hash: lock held while that file is parsed so concurrent requests parse it once
+
+  def fileHash(self, path: str):
+    '''
+    inputs: path to sdd
+    outputs: sha1 hash of the file contents
+
+    The goal of this function is to identify a file by its contents, only hashing it again when it changes on disk.
+    '''
+    stat = os.stat(path)
+    signature = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+    with self.lock:
+      if signature in self.hashes:
+        return self.hashes[signature]
+    digest = hashlib.sha1() # hashed outside the lock so other files are served meanwhile
+    with open(path, "rb") as file:
+      for chunk in iter(lambda: file.read(1 << 20), b""): # hash in 1 MB chunks
+        digest.update(chunk)
+    with self.lock:
+      self.hashes = {old: known for old, known in self.hashes.items() if old[0] != signature[0]} # older versions of the file are not needed again
+      self.hashes[signature] = digest.hexdigest()
+    return self.hashes[signature]
+
+  def get(self, path: str, width: int, length: int):
+    '''
+    inputs: path to sdd, width and length of frame
+    outputs: scaled parsedSDD dataframe and scaled nucleus volume
+
+    The goal of this function is to return a dataset from memory, parsing and scaling it only on the first request.
+    '''
+    key = self.fileHash(path)
+    with self.lock:
+      entry = self.datasets.get(key)
+      if entry != None:
+        self.datasets.move_to_end(key) # most recently used
+      else:
+        loading = self.loading.setdefault(key, threading.Lock())
+
+    if entry == None:
+      with loading: # a second request for the same file waits here for the first to finish parsing
+        with self.lock:
+          entry = self.datasets.get(key)
+        if entry == None:
+          try:
+            df, volumes, sdd = draw.openSSD(path) # parse once, outside the cache lock; nothing is written to disk
+            entry = {"path": path, "parsed": df, "volumes": volumes, "scaled": {}, "lock": threading.Lock()}
+            with self.lock:
+              self.datasets[key] = entry
+              while len(self.datasets) > self.capacity: # drop least recently used
+                evicted = self.datasets.popitem(last=False)[0]
+                self.hashes = {signature: digest for signature, digest in self.hashes.items() if digest != evicted} # along with the files that hashed to it
+          finally:
+            with self.lock:
+              self.loading.pop(key, None)
+
+    with entry["lock"]: # scaled once per frame size
+      if (width, length) not in entry["scaled"]:
+        newdf, sx, sy, sz = draw.scalePositionalData(entry["parsed"], width, length) # scaling the positional data
+        entry["scaled"][(width, length)] = (newdf, draw.scaleNucleus(entry["volumes"], sx, sy, sz))
+      return entry["scaled"][(width, length)]
+
+  def status(self):
+    '''
+    inputs: none
+    outputs: list of cached datasets, least recently used first
+
+    The goal of this function is to show what is in memory.
+    '''
+    with self.lock:
+      return [{"hash": key, "path": entry["path"], "rows": len(entry["parsed"].index), "scales": [list(scale) for scale in list(entry["scaled"])]} for key, entry in self.datasets.items()]
+
+def warmWorker():
+
+  # draw one 3D figure so imports, fonts and mplot3d are loaded before the first request
+  fig = plt.figure()
+  ax = fig.add_subplot(111, projection="3d")
+  ax.scatter([0], [0], [0])
+  fig.savefig(io.BytesIO(), format="png")
+  plt.close(fig)
+
+def render(df: pd.DataFrame, key: str, volumes: list, size: bool, angle_tup: tuple = None):
+  '''
+  inputs: dataframe to plot, column to color coordinate by (None for unlabelled), scaled nucleus volume, flag to modulate size, optional angle
+  outputs: png image as bytes
+
+  The goal of this function is to render a single image in a worker process and send it back without writing to disk.
+  '''
+  colorlist = sorted(list(mcolors.CSS4_COLORS)) # various matplotlib colors
+  fig = plt.figure() # create new fig object
+  ax = fig.add_subplot(111, projection="3d") # create a 3D plot in figure
+  draw.graphNucleus(ax, volumes)
+  draw.graphPoints(ax, df, key, size, colorlist)
+  if key != None:
+    plt.legend(loc="upper right", ncol = 6, fontsize = "xx-small") # apply legend
+  if angle_tup != None:
+    ax.view_init(angle_tup[0], angle_tup[1])
+  buffer = io.BytesIO()
+  fig.savefig(buffer, format="png")
+  plt.close(fig) # close to avoid overlaps
+  return buffer.getvalue()
+
+def prepare(cache: DatasetCache, request: dict):
+  '''
+  inputs: dataset cache, render request
+  outputs: arguments for render
+
+  The goal of this function is to apply the filter, labels and size options of a request to the cached dataset.
+  '''
+  if "input" not in request:
+    raise ValueError("Request needs an input sdd path.")
+  newdf, nucleusAxes = cache.get(request["input"], int(request.get("width", 10)), int(request.get("length", 10)))
+
+  if request.get("filter") != None:
+    newdf = draw.filter(newdf, request["filter"]) # filter returns a copy so the cached dataframe is untouched
+  if request.get("coordinate") != None:
+    pb, newdf = draw.label(newdf.copy(), request["coordinate"]) # label changes the dataframe it is given so give it a copy
+
+  key = request.get("key")
+  if key != None and key not in newdf.columns:
+    raise ValueError(f"Cannot label by values in column {key} because it is not in the provided sdd.")
+  size = bool(request.get("size", False)) and "totalDamages" in newdf.columns
+  if size:
+    newdf = draw.scaleSizes(newdf, int(request.get("width", 10)), int(request.get("length", 10)))
+
+  columns = ['xcenter', 'ycenter', 'zcenter'] + ([key] if key != None else []) + (['totalDamages'] if size else []) # only send what is drawn to the worker
+  angle = request.get("angle")
+  return newdf[columns], key, nucleusAxes, size, tuple(angle) if angle != None else None
+
+class RenderHandler(BaseHTTPRequestHandler):
+  '''
+  POST /render with a json body renders an image; GET /status lists the cached datasets.
+  '''
+  def reply(self, code: int, body: bytes, contentType: str = "application/json"):
+    self.send_response(code)
+    self.send_header("Content-Type", contentType)
+    self.send_header("Content-Length", str(len(body)))
+    self.end_headers()
+    self.wfile.write(body)
+
+  def error(self, code: int, message: str):
+    self.reply(code, json.dumps({"error": message}).encode())
+
+  def do_GET(self):
+    if self.path == "/status":
+      self.reply(200, json.dumps(self.server.cache.status()).encode())
+    else:
+      self.error(404, f"Unknown path {self.path}.")
+
+  def do_POST(self):
+    if self.path != "/render":
+      self.error(404, f"Unknown path {self.path}.")
+      return
+    try:
+      request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+      arguments = prepare(self.server.cache, request)
+    except (ValueError, KeyError, OSError) as e: # bad json, missing file or unknown column
+      self.error(400, str(e))
+      return
+    except Exception as e: # e.g. a malformed filter or label yaml
+      self.error(500, str(e))
+      return
+    try:
+      png = self.server.executor.submit(render, *arguments).result()
+    except Exception as e:
+      self.error(500, str(e))
+      return
+    self.reply(200, png, "image/png")
+
+if __name__ == "__main__":
+    warnings.filterwarnings("ignore")
+
+    args = parseIt.parse_args() # creating an args object to extract user input
+
+    start = "\033[1;3m"
+    end = "\033[0m"
+    server = ThreadingHTTPServer((args.host, args.port), RenderHandler)
+    server.cache = DatasetCache(args.cache)
+    with ppe(max_workers=int(args.workers), initializer=warmWorker) as executor:
+        server.executor = executor
+        for future in [executor.submit(warmWorker) for i in range(int(args.workers))]: # start every worker now instead of on the first request
+            future.result()
+        print(start + f"Serving on http://{args.host}:{args.port}" + end)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
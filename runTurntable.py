@@ -0,0 +1,131 @@
+import draw
+import argparse
+import warnings
+import os
+import pandas as pd
+import matplotlib.pyplot as plt
+from tqdm import tqdm
+import matplotlib.colors as mcolors
+import numpy as np
+from concurrent.futures import ProcessPoolExecutor as ppe
+from itertools import repeat
+from createVideo import createVideo
+
+# standard views as (elevation, azimuth) pairs
+presetViews = {"front": (0, -90), "back": (0, 90), "left": (0, 180), "right": (0, 0), "top": (90, -90), "bottom": (-90, -90), "iso": (30, -60)}
+
+# parser arguments to allow for customized drawing
+parseIt = argparse.ArgumentParser() # create argument parser object
+parseIt.add_argument('-i', '--input', help='path to ssd file', required=True) # input path to sdd
+parseIt.add_argument('-w', '--width', help='width of output images', required=False, default=10, type=int) # width of frame defaults to 10
+parseIt.add_argument('-l', '--length', help='length of output images', required=False, default=10, type=int) # length of frame defaults to 10
+parseIt.add_argument('-f', '--filter', help='yaml file with filter configurations', required=False, default=None) # filter.yaml path to help filter the dataset
+parseIt.add_argument('-c', '--coordinate', help='yaml file with labelling configurations', required=False, default=None) # coordinate.yaml to help plot the data with color coordination
+parseIt.add_argument('-s', '--save', help='output folder path', required=False, default='.') # output folder path for png files
+parseIt.add_argument('-p', '--workers', help='number of processes to use', required=False, type=int, default=1) # number of processes the angles are spread across
+parseIt.add_argument('-t', '--fps', help='frames per second for rotation video speed', type=int, required=False, default=30) # speed of the rotation video
+parseIt.add_argument('--size', help='boolean flag to allow for size modulation of damage centroids', required=False, default=False, action=argparse.BooleanOptionalAction)
+parseIt.add_argument('-n', '--steps', help='number of azimuth steps in a full rotation', type=int, required=False, default=72) # 5 degrees per step by default
+parseIt.add_argument('-e', '--elevation', help='elevation angle of the rotation', type=int, required=False, default=30)
+parseIt.add_argument('--views', help='list of preset views to render instead of a rotation', required=False, nargs='+', choices=list(presetViews.keys()), default=None)
+parseIt.add_argument('--video', help='boolean flag to put the rotation frames together as a video', required=False, default=True, action=argparse.BooleanOptionalAction)
+
+def turntableAngles(steps: int, elevation: int):
+  '''
+  inputs: number of azimuth steps, elevation angle
+  outputs: list of (elevation, azimuth) tuples covering a full rotation
+
+  The goal of this function is to create evenly spaced view angles for a rotation around the nucleus.
+  '''
+  azimuths = np.linspace(0, 360, steps, endpoint=False) # full circle without repeating the first angle
+  return [(elevation, float(azimuth)) for azimuth in azimuths]
+
+def graph(df: pd.DataFrame, labelCoordinateList: list, outputDirs: list, basicOutputDir: str, volumes: list, size: bool, angles: list, indices: list):
+  '''
+  inputs: dataframe to plot, list to color coordinate data by, output directories for labelled images, output directory for unlabelled images, scaled nucleus volume, flag to modulate size, list of (elevation, azimuth) angles and their frame indices
+  outputs: plots saved to output directories (labelled and unlablled), one per angle
+
+  The goal of this function is to draw each figure once and only move the camera for every angle, so the nucleus and points are reused across views.
+  '''
+  colorlist = sorted(list(mcolors.CSS4_COLORS)) # various matplotlib colors
+
+  for key, f in zip(labelCoordinateList + [None], outputDirs + [basicOutputDir]): # labelled figures then the unlabelled figure
+    fig = plt.figure() # create new fig object
+    ax = fig.add_subplot(111, projection="3d") # create a 3D plot in figure
+    draw.graphNucleus(ax, volumes)
+    draw.graphPoints(ax, df, key, size, colorlist)
+    if key != None:
+      plt.legend(loc="upper right", ncol = 6, fontsize = "xx-small") # apply legend
+    for (elevation, azimuth), ind in zip(angles, indices): # only the camera changes between angles
+      ax.view_init(elevation, azimuth)
+      fig.suptitle(f"Elevation {elevation}, Azimuth {azimuth:g}")
+      if key != None:
+        fig.savefig(os.path.join(f, f"damage_{key}_{ind}.png")) # save figure based on labelled column
+      else:
+        fig.savefig(os.path.join(f, f"damage_{ind}.png")) # save basic image
+    plt.close(fig) # close to avoid overlaps
+
+def plot(df, chunk, angles, pb, folders, outFold, nucleusAxes, sizeBool):
+
+  graph(df, pb, folders, outFold, nucleusAxes, sizeBool, [angles[i] for i in chunk], [i + 1 for i in chunk]) # create and save plots for this worker's angles
+
+if __name__ == "__main__":
+    warnings.filterwarnings("ignore")
+
+    args = parseIt.parse_args() # creating an args object to extract user input
+    assert args.steps >= 1, "The turntable needs at least 1 step."
+
+    if not os.path.isdir(args.save):
+        os.mkdir(args.save)
+    else:
+        pass
+
+    if args.views != None:
+        angles = [presetViews[view] for view in args.views]
+    else:
+        angles = turntableAngles(args.steps, args.elevation)
+
+    start = "\033[1;3m"
+    end = "\033[0m"
+    print(start + "Extracting SDD Information..." + end)
+    df, volumes, sdd = draw.openSSD(args.input, outpath = args.save) # original unprocessed dataframe; remains untouched
+    newdf, sx, sy, sz = draw.scalePositionalData(df, int(args.width), int(args.length)) # scaling the positional data; return new dataframe object in memory
+    print()
+
+    nucleusAxes = draw.scaleNucleus(volumes, sx, sy, sz) # nucleus on the same scale as the damage centers
+
+    if args.filter != None: # ensuring this is inputed, else basic plot
+        print(start + "Filtering SDD..." + end)
+        newdf = draw.filter(newdf, args.filter) # applies filter to new dataframe object in memory
+        print()
+    pb = [] # instantiating empty variable incase labels not applied
+
+    if args.coordinate != None: # ensuring this is inputed, else basic plot
+        print(start + "Applying labels to SDD..." + end)
+        pb, newdf = draw.label(newdf, args.coordinate) # applies labels to the same dataframe in memory as filter
+
+    if args.size:
+        newdf = draw.scaleSizes(newdf, int(args.width), int(args.length))
+
+    folders = []
+    for f in pb:
+        if f not in os.listdir(args.save):
+            os.mkdir(f"./{args.save}/{f}")
+        folders.append(f"./{args.save}/{f}")
+    if "unlabeled" not in os.listdir(args.save):
+        os.mkdir(f"./{args.save}/unlabeled")
+
+    print(start + "Rendering views..." + end)
+    workers = max(1, min(int(args.workers), len(angles)))
+    chunks = [list(chunk) for chunk in np.array_split(np.arange(len(angles)), workers)] # contiguous block of angles per worker
+    with ppe(max_workers=workers) as executor:
+        results = list(tqdm(executor.map(plot, repeat(newdf), chunks, repeat(angles), repeat(pb), repeat(folders), repeat(f"./{args.save}/unlabeled"), repeat(nucleusAxes), repeat(args.size)), total=len(chunks)))
+
+    if args.video:
+        print()
+        print(start + "Creating rotation videos from frames" + end)
+        folders.append(f"./{args.save}/unlabeled")
+        if "videos" not in os.listdir(args.save):
+            os.mkdir(os.path.join(args.save, "videos"))
+        for f in tqdm(folders):
+            createVideo(f, os.path.join(args.save, "videos"), f"{f}.avi", int(args.fps))
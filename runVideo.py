@@ -1,4 +1,6 @@
 import draw
+import raster
+import cv2
 import argparse
 import warnings
 import os
@@ -8,9 +10,8 @@ from tqdm import tqdm
 import matplotlib.colors as mcolors
 import random
 import numpy as np
-from concurrent.futures import ProcessPoolExecutor as ppe
-from itertools import repeat
-from createVideo import createVideo
+from concurrent.futures import ProcessPoolExecutor as ppe, wait, FIRST_COMPLETED, ALL_COMPLETED
+from createVideo import VideoEncoder
 
 # parser arguments to allow for customized drawing
 parseIt = argparse.ArgumentParser() # create argument parser object
@@ -25,64 +26,103 @@ parseIt.add_argument('-t', '--fps', help='frames per second for video speed', ty
 parseIt.add_argument('--size', help='boolean flag to allow for size modulation of damage centroids', required=False, default=False, action=argparse.BooleanOptionalAction)
 parseIt.add_argument('-n', "--frames", help="total number of frames to generate", type=int, required=False, default=1200)
 parseIt.add_argument('--angle', help='two arguments to change the angle of the image', required=False, nargs=2, type=int, default=None)
+parseIt.add_argument('-k', '--window', help='only show damage from the last K frames instead of all damage so far', type=int, required=False, default=None)
+parseIt.add_argument('--incremental', help='boolean flag to only parse lines appended to the sdd since the last run with the same output folder', required=False, default=False, action=argparse.BooleanOptionalAction)
+parseIt.add_argument('--backend', help='draw frames with matplotlib or with the faster 2D raster renderer', required=False, choices=['matplotlib', 'raster'], default='matplotlib')
 
-def graph(df: pd.DataFrame, unfilteredDF: pd.DataFrame, labelCoordinateList: list, outputDirs: list, basicOutputDir: str, volumes: list, size: bool, ind: int, timescaler, angles_tup: tuple = None):
+def frameTitle(ind: int, timescaler, window: int = None):
   '''
-  inputs: dataframe to plot, list to color coordinate data by, output directory to store images, flag to override and plot points
-  outputs: plots saved to output directory (labelled and unlablled)
+  inputs: frame index, lesion time scaler, optional sliding window length
+  outputs: title of the frame
+  '''
+  title = f"Frame {ind}: {timescaler.inverse_transform(np.array([[ind]]))[0][0]} ns into the Simulation"
+  if window != None:
+    title = title + f" (last {window} frames)"
+  return title
+
+def graph(df: pd.DataFrame, uniqueVals: dict, labelCoordinateList: list, outputDirs: list, basicOutputDir: str, volumes: list, size: bool, ind: int, timescaler, angles_tup: tuple = None, window: int = None):
+  '''
+  inputs: dataframe to plot, unique values of each label column, list to color coordinate data by, output directory to store images, flag to override and plot points, frame index, lesion time scaler, optional angle and sliding window length
+  outputs: plots saved to output directory (labelled and unlablled); list of (output directory, image path) saved
   
   The goal of this function is to plot the graph with points/lines of damage and labelled/filtered as desired by the user. The png files will be labelled by filtration criteria and a basic one without labels
   '''
   colorlist = sorted(list(mcolors.CSS4_COLORS)) # various matplotlib colors
+  saved = []
+  title = frameTitle(ind, timescaler, window)
 
   for key, f in zip(labelCoordinateList, outputDirs): # iterate through list of labels
     fig = plt.figure() # create new fig object
     ax = fig.add_subplot(111, projection="3d") # create a 3D plot in figure
-    uniqueVals = list(unfilteredDF[key].unique()) # find unique values of the column
-    left = uniqueVals.copy() # copy a index tracker for which labels used
     draw.graphNucleus(ax, volumes)
-    for x, y, z, l, i in zip(df['xcenter'], df['ycenter'], df['zcenter'], df[key], df.index): # iterate through centers, labelled column and index in dataframe
-      if l in left: # if label still in index tracker (meaning no labelled values by this unique value)
-        if "totalDamages" in df.columns and size: # if direct and indirect (changing size of damage on plot since basically the number of damages)
-          ax.plot3D(x, y, z, marker=".", color=colorlist[uniqueVals.index(l)], markersize=(df["totalDamages"][i]), label = l) # plot point with label, its own unique color, and size
-          left.remove(l) # remove from index to not reuse and create a large legend (weird workaround pyplot)
-        else: # if direct and indirect not in dataframe
-          ax.plot3D(x, y, z, marker=".", color=colorlist[uniqueVals.index(l)], markersize=1, label = l) # cannot change size of points
-          left.remove(l) # remove since first time using this label in legend
-      
-      else: # if label not in index list for unique values
-        if "totalDamages" in df.columns and size:# if direct and indirect (changing size of damage on plot since basically the number of damages)
-          ax.plot3D(x, y, z, marker=".", color=colorlist[uniqueVals.index(l)], markersize=(df["totalDamages"][i])) # plot point without label since already applied but color will be unique to label
-        else: # if no direct, indirect
-          ax.plot3D(x, y, z, marker=".", color=colorlist[uniqueVals.index(l)], markersize=1) # size not modulated by number of damages in the center damage point
-      if angles_tup != None:
-        ax.view_init(angles_tup[0], angles_tup[1])
+    draw.graphPoints(ax, df, key, size, colorlist, uniqueVals[key]) # unique values of the whole dataset keep colors the same across frames
+    if angles_tup != None:
+      ax.view_init(angles_tup[0], angles_tup[1])
     plt.legend(loc="upper right", ncol = 6, fontsize = "xx-small") # apply legend
-    fig.suptitle(f"Frame {ind}: {timescaler.inverse_transform(np.array([[ind]]))[0][0]} ns into the Simulation")
+    fig.suptitle(title)
     fig.savefig(os.path.join(f, f"damage_{key}_{ind}.png")) # save figure based on labelled column
+    saved.append((f, os.path.join(f, f"damage_{key}_{ind}.png")))
     plt.close(fig) # close to avoid overlaps
 
   fig = plt.figure() # create new figure
   ax = fig.add_subplot(111, projection="3d") # add 3D component
   draw.graphNucleus(ax, volumes)
-  if "totalDamages" in df.columns and size: # if direct and indirect (changing size of damage on plot since basically the number of damages)
-    for x, y, z, i in zip(df['xcenter'], df['ycenter'], df['zcenter'], df.index): # iterate through centers, labelled column and index in dataframe
-      ax.plot3D(x, y, z, marker=".", color='k', markersize=(df["totalDamages"][i])) # graph with size modulation and no labels
-  else: # if no direct/indirect
-    for x, y, z, i in zip(df['xcenter'], df['ycenter'], df['zcenter'], df.index): # iterate through centers, labelled column and index in dataframe
-      ax.plot3D(x, y, z, marker=".", markersize=1, color='k') # same size for all points
+  draw.graphPoints(ax, df, None, size, colorlist)
   if angles_tup != None:
     ax.view_init(angles_tup[0], angles_tup[1])
 
-  fig.suptitle(f"Frame {ind}: {timescaler.inverse_transform(np.array([[ind]]))[0][0]} ns into the Simulation")
+  fig.suptitle(title)
   fig.savefig(os.path.join(basicOutputDir, f"damage_{ind}.png")) # save basic image
+  saved.append((basicOutputDir, os.path.join(basicOutputDir, f"damage_{ind}.png")))
 
   plt.close(fig) # close to avoid overlaps
+  return saved
+
+def rasterGraph(scene: raster.RasterScene, first: int, last: int, labelCoordinateList: list, outputDirs: list, basicOutputDir: str, ind: int, timescaler, window: int = None):
+  '''
+  inputs: raster scene of the whole dataset, first and last row of the frame, list to color coordinate data by, output directories for labelled images, output directory for unlabelled images, frame index, lesion time scaler, optional sliding window length
+  outputs: plots saved to output directories (labelled and unlablled); list of (output directory, image array) so the encoders do not read the pngs back
+
+  The goal of this function is to draw a frame with the raster renderer instead of matplotlib; file names match graph.
+  '''
+  title = frameTitle(ind, timescaler, window)
+  saved = []
+  for key, f in zip(labelCoordinateList + [None], outputDirs + [basicOutputDir]): # labelled images then the unlabelled image
+    image = scene.frame(first, last, key, title)
+    name = f"damage_{key}_{ind}.png" if key != None else f"damage_{ind}.png"
+    cv2.imwrite(os.path.join(f, name), image, [cv2.IMWRITE_PNG_COMPRESSION, 1]) # light compression so saving keeps up with drawing
+    saved.append((f, image))
+  return saved
+
+def closeEncoders(encoders):
+  '''
+  inputs: video encoders
+  outputs: list of errors raised by the encoders
 
-def plot(df, i, pb, folders, outFold, nucleusAxes, sizeBool, timescaler, angles):
+  The goal of this function is to finish and release every video even when one of the encoders failed.
+  '''
+  errors = []
+  for encoder in encoders:
+    try:
+      encoder.close()
+    except Exception as e:
+      errors.append(e)
+  return errors
+
+frameData = {} # bucketed dataframe and frame offsets, set once in each worker process
+
+def initWorker(df, offsets, uniqueVals, scene=None):
+  
+  # stored once per process so each frame only sends its index to the worker
+  frameData["df"], frameData["offsets"], frameData["uniqueVals"], frameData["scene"] = df, offsets, uniqueVals, scene
+
+def plot(i, pb, folders, outFold, nucleusAxes, sizeBool, timescaler, angles, window):
    
-   tempDF = df[df["lesiontimes"] <= int(i)]
-   graph(tempDF, df, pb, folders, outFold, nucleusAxes, sizeBool, int(i), timescaler, angles) # create and save plots
+   first, last = draw.frameRows(frameData["offsets"], int(i), window) # rows of this frame from the precomputed frame bins
+   if frameData["scene"] != None: # raster backend draws straight from the projected rows
+      return int(i), rasterGraph(frameData["scene"], first, last, pb, folders, outFold, int(i), timescaler, window)
+   tempDF = frameData["df"].iloc[first:last]
+   return int(i), graph(tempDF, frameData["uniqueVals"], pb, folders, outFold, nucleusAxes, sizeBool, int(i), timescaler, angles, window) # create and save plots
 
 if __name__ == "__main__":
     warnings.filterwarnings("ignore")
@@ -96,25 +136,20 @@ if __name__ == "__main__":
         pass
 
     assert(args.fps <= args.frames)
+    assert args.window == None or args.window >= 1, "The window must be at least 1 frame." # an empty window would show no damage in any frame
 
     start = "\033[1;3m"
     end = "\033[0m"
     print(start + "Extracting SDD Information..." + end)
-    df, volumes, sdd = draw.openSSD(args.input, outpath = args.save, num_frames=args.frames) # original unprocessed dataframe; remains untouched
+    df, volumes, sdd = draw.openSSD(args.input, outpath = args.save, num_frames=args.frames, incremental=args.incremental) # original unprocessed dataframe; remains untouched
     
-    if "lesionTimes" not in df.columns:
-       pass
-    else:
+    if "lesiontimes" not in df.columns:
        raise ValueError("Input an SDD with lesion times.")
     
     newdf, sx, sy, sz = draw.scalePositionalData(df, int(args.width), int(args.length)) # scaling the positional data; return new dataframe object in memory
     print()
 
-    nucleusAxes = []
-    if len(volumes) > 7:
-        nucleusAxes = [int(volumes[7]), sx.transform([[volumes[8]]]).item(), sy.transform([[volumes[9]]]).item(), sz.transform([[volumes[10]]]).item(), sx.transform([[volumes[11]]]).item(), sy.transform([[volumes[12]]]).item(), sz.transform([[volumes[13]]]).item()]
-    elif len(volumes) == 7:
-        nucleusAxes = [int(volumes[0]), sx.transform([[volumes[1]]]).item(), sy.transform([[volumes[2]]]).item(), sz.transform([[volumes[3]]]).item(), sx.transform([[volumes[4]]]).item(), sy.transform([[volumes[5]]]).item(), sz.transform([[volumes[6]]]).item()]
+    nucleusAxes = draw.scaleNucleus(volumes, sx, sy, sz) # nucleus on the same scale as the damage centers
 
     if args.filter != None: # ensuring this is inputed, else basic plot
         print(start + "Filtering SDD..." + end)
@@ -135,14 +170,37 @@ if __name__ == "__main__":
     if "unlabeled" not in os.listdir(args.save):
         os.mkdir(f"./{args.save}/unlabeled")
 
-    with ppe(max_workers=int(args.workers)) as executor:
-        indices = [i for i in range(1, args.frames + 1)] # 1201
-        results = list(tqdm(executor.map(plot, repeat(newdf), indices, repeat(pb), repeat(folders), repeat(f"./{args.save}/unlabeled"), repeat(nucleusAxes), repeat(args.size), repeat(sdd.timescaler), repeat(args.angle)), total=args.frames))
+    uniqueVals = {key: draw.distinctValues(newdf, key) for key in pb} # colors stay fixed across frames
+    newdf, offsets = draw.bucketFrames(newdf, args.frames) # sort damages into frame bins once
+    scene = None
+    if args.backend == "raster": # project, depth sort and color every damage once for all frames
+        sized = draw.scaleSizes(newdf, int(args.width), int(args.length)) if args.size else newdf # damage counts to sizes 1 to 5 like runImage, so discs stay a few pixels wide
+        scene = raster.RasterScene(sized, pb, uniqueVals, nucleusAxes, args.size, min(int(args.width), int(args.length)), args.angle)
 
-    print()
-    print(start + "Creating videos from frames" + end)
-    folders.append(f"./{args.save}/unlabeled")
+    # each label gets an encoder thread that writes frames into its video while later frames are still rendering
     if "videos" not in os.listdir(args.save):
         os.mkdir(os.path.join(args.save, "videos"))
-    for f in tqdm(folders):
-        createVideo(f, os.path.join(args.save, "videos"), f"{f}.avi", int(args.fps))
+    encoders = {f: VideoEncoder(os.path.join(args.save, "videos", f"{os.path.basename(f)}.avi"), int(args.fps)) for f in folders + [f"./{args.save}/unlabeled"]}
+    for encoder in encoders.values():
+        encoder.start()
+
+    print(start + "Rendering and encoding frames..." + end)
+    inflight = 4 * int(args.workers) # frames submitted but not yet handed to the encoders
+    try:
+        with ppe(max_workers=int(args.workers), initializer=initWorker, initargs=(newdf, offsets, uniqueVals, scene)) as executor, tqdm(total=args.frames) as progress:
+            running = set()
+            for i in range(1, args.frames + 1): # 1201
+                running.add(executor.submit(plot, i, pb, folders, f"./{args.save}/unlabeled", nucleusAxes, args.size, sdd.timescaler, args.angle, args.window))
+                if len(running) >= inflight or i == args.frames: # hand finished frames over before submitting more
+                    done, running = wait(running, return_when=FIRST_COMPLETED if i != args.frames else ALL_COMPLETED)
+                    for future in done:
+                        ind, saved = future.result()
+                        for f, image in saved:
+                            encoders[f].put(ind, image) # blocks if that encoder is behind
+                        progress.update(1)
+    except BaseException:
+        closeEncoders(encoders.values()) # finish every video; the rendering error is the one reported
+        raise
+    errors = closeEncoders(encoders.values())
+    if len(errors) != 0:
+        raise errors[0]
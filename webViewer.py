@@ -0,0 +1,289 @@
+# imports
+import pandas as pd
+import numpy as np
+import matplotlib.colors as mcolors
+import base64
+import json
+import os
+import draw
+
+# self-contained viewer; the metadata and the binary point buffer are put into the two script tags
+viewerTemplate = '''<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>__TITLE__</title>
+<style>
+  html, body { margin: 0; height: 100%; overflow: hidden; font-family: sans-serif; background: #fff; }
+  canvas { width: 100%; height: 100%; display: block; }
+  #panel { position: absolute; top: 8px; right: 8px; max-height: 90%; overflow-y: auto; background: rgba(255, 255, 255, 0.85); border: 1px solid #ccc; padding: 6px; font-size: 11px; }
+  #panel label { display: block; white-space: nowrap; }
+  .swatch { display: inline-block; width: 10px; height: 10px; margin: 0 4px; vertical-align: middle; }
+  #help { position: absolute; bottom: 8px; left: 8px; font-size: 11px; color: #555; }
+</style>
+</head>
+<body>
+<canvas id="view"></canvas>
+<div id="panel"><select id="key"></select><div id="legend"></div></div>
+<div id="help">drag to rotate, scroll to zoom, double click to reset</div>
+<script id="meta" type="application/json">__META__</script>
+<script id="data" type="application/octet-stream">__DATA__</script>
+<script>
+(function () {
+  // decode the binary buffer into typed arrays without copying the columns
+  var meta = JSON.parse(document.getElementById("meta").textContent);
+  var raw = atob(document.getElementById("data").textContent.trim());
+  var bytes = new Uint8Array(raw.length);
+  for (var i = 0; i < raw.length; i++) { bytes[i] = raw.charCodeAt(i); }
+  var n = meta.count;
+  var positions = new Float32Array(bytes.buffer, meta.positions, n * 3);
+  var sizes = new Float32Array(bytes.buffer, meta.sizes, n);
+  meta.keys.forEach(function (k) {
+    k.codes = new Uint16Array(bytes.buffer, k.offset, n);
+    k.visible = k.labels.map(function () { return true; });
+  });
+
+  var canvas = document.getElementById("view");
+  var gl = canvas.getContext("webgl", { antialias: true });
+  if (!gl) { document.body.innerHTML = "WebGL is not available in this browser."; return; }
+
+  var vertexSource = [
+    "attribute vec3 position; attribute float size; attribute vec4 color;",
+    "uniform mat4 mvp; uniform float scale;",
+    "varying vec4 vColor;",
+    "void main() { gl_Position = mvp * vec4(position, 1.0); gl_PointSize = size * scale; vColor = color; }"
+  ].join("\\n");
+  var fragmentSource = [
+    "precision mediump float; varying vec4 vColor; uniform float isPoints;",
+    "void main() {",
+    "  if (vColor.a == 0.0) { discard; }",
+    "  if (isPoints > 0.5) { vec2 d = gl_PointCoord - vec2(0.5); if (dot(d, d) > 0.25) { discard; } }",
+    "  gl_FragColor = vColor;",
+    "}"
+  ].join("\\n");
+  function compile(type, source) {
+    var shader = gl.createShader(type);
+    gl.shaderSource(shader, source);
+    gl.compileShader(shader);
+    return shader;
+  }
+  var program = gl.createProgram();
+  gl.attachShader(program, compile(gl.VERTEX_SHADER, vertexSource));
+  gl.attachShader(program, compile(gl.FRAGMENT_SHADER, fragmentSource));
+  gl.linkProgram(program);
+  gl.useProgram(program);
+  var loc = {
+    position: gl.getAttribLocation(program, "position"), size: gl.getAttribLocation(program, "size"), color: gl.getAttribLocation(program, "color"),
+    mvp: gl.getUniformLocation(program, "mvp"), scale: gl.getUniformLocation(program, "scale"), isPoints: gl.getUniformLocation(program, "isPoints")
+  };
+
+  function upload(array) {
+    var buffer = gl.createBuffer();
+    gl.bindBuffer(gl.ARRAY_BUFFER, buffer);
+    gl.bufferData(gl.ARRAY_BUFFER, array, gl.STATIC_DRAW);
+    return buffer;
+  }
+  var positionBuffer = upload(positions);
+  var sizeBuffer = upload(sizes);
+  var colors = new Uint8Array(n * 4);
+  var colorBuffer = upload(colors);
+
+  // nucleus outline as rings of latitude and longitude, same radii as the matplotlib surface
+  var nucleusLines = [];
+  if (meta.nucleus) {
+    var r = meta.nucleus, segments = 64;
+    function point(u, v) { return [r[0] * Math.sin(v) * Math.cos(u), r[1] * Math.sin(v) * Math.sin(u), r[2] * Math.cos(v)]; }
+    for (var a = 1; a < 12; a++) {
+      for (var s = 0; s < segments; s++) {
+        nucleusLines.push.apply(nucleusLines, point(2 * Math.PI * s / segments, Math.PI * a / 12));
+        nucleusLines.push.apply(nucleusLines, point(2 * Math.PI * (s + 1) / segments, Math.PI * a / 12));
+      }
+    }
+    for (var b = 0; b < 24; b++) {
+      for (var s2 = 0; s2 < segments; s2++) {
+        nucleusLines.push.apply(nucleusLines, point(2 * Math.PI * b / 24, Math.PI * s2 / segments));
+        nucleusLines.push.apply(nucleusLines, point(2 * Math.PI * b / 24, Math.PI * (s2 + 1) / segments));
+      }
+    }
+  }
+  var nucleusBuffer = upload(new Float32Array(nucleusLines));
+
+  // label selection and toggling only rewrite the color buffer
+  var select = document.getElementById("key");
+  var legend = document.getElementById("legend");
+  var current = null;
+  function recolor() {
+    for (var i = 0; i < n; i++) {
+      var o = i * 4;
+      if (current === null) { colors[o] = 0; colors[o + 1] = 0; colors[o + 2] = 0; colors[o + 3] = 255; continue; }
+      var code = current.codes[i], c = meta.palette[code % meta.palette.length];
+      colors[o] = c[0]; colors[o + 1] = c[1]; colors[o + 2] = c[2]; colors[o + 3] = current.visible[code] ? 255 : 0;
+    }
+    gl.bindBuffer(gl.ARRAY_BUFFER, colorBuffer);
+    gl.bufferSubData(gl.ARRAY_BUFFER, 0, colors);
+    redraw();
+  }
+  function buildLegend() {
+    legend.innerHTML = "";
+    if (current === null) { return; }
+    current.labels.forEach(function (name, code) {
+      var c = meta.palette[code % meta.palette.length];
+      var row = document.createElement("label");
+      var box = document.createElement("input");
+      box.type = "checkbox";
+      box.checked = current.visible[code];
+      box.onchange = function () { current.visible[code] = box.checked; recolor(); };
+      var swatch = document.createElement("span");
+      swatch.className = "swatch";
+      swatch.style.background = "rgb(" + c.join(",") + ")";
+      row.appendChild(box);
+      row.appendChild(swatch);
+      row.appendChild(document.createTextNode(name));
+      legend.appendChild(row);
+    });
+  }
+  meta.keys.forEach(function (k, index) { select.add(new Option(k.name, index)); });
+  select.add(new Option("unlabeled", -1));
+  select.onchange = function () {
+    current = select.value < 0 ? null : meta.keys[select.value];
+    buildLegend();
+    recolor();
+  };
+
+  // orbit camera around the origin with z up, like matplotlib
+  var home = { elevation: meta.angle[0], azimuth: meta.angle[1], distance: meta.extent * 3.5 };
+  var camera = { elevation: home.elevation, azimuth: home.azimuth, distance: home.distance };
+  function normalize(v) { var l = Math.hypot(v[0], v[1], v[2]); return [v[0] / l, v[1] / l, v[2] / l]; }
+  function cross(a, b) { return [a[1] * b[2] - a[2] * b[1], a[2] * b[0] - a[0] * b[2], a[0] * b[1] - a[1] * b[0]]; }
+  function dot(a, b) { return a[0] * b[0] + a[1] * b[1] + a[2] * b[2]; }
+  function multiply(a, b) {
+    var out = new Float32Array(16);
+    for (var c = 0; c < 4; c++) { for (var r = 0; r < 4; r++) {
+      out[c * 4 + r] = a[r] * b[c * 4] + a[4 + r] * b[c * 4 + 1] + a[8 + r] * b[c * 4 + 2] + a[12 + r] * b[c * 4 + 3];
+    } }
+    return out;
+  }
+  function matrix() {
+    var el = camera.elevation * Math.PI / 180, az = camera.azimuth * Math.PI / 180, d = camera.distance;
+    var eye = [d * Math.cos(el) * Math.cos(az), d * Math.cos(el) * Math.sin(az), d * Math.sin(el)];
+    var f = normalize([-eye[0], -eye[1], -eye[2]]), s = normalize(cross(f, [0, 0, 1])), u = cross(s, f);
+    var view = [s[0], u[0], -f[0], 0, s[1], u[1], -f[1], 0, s[2], u[2], -f[2], 0, -dot(s, eye), -dot(u, eye), dot(f, eye), 1];
+    var near = d / 100, far = d * 10, t = 1 / Math.tan(Math.PI / 8), aspect = canvas.width / canvas.height;
+    var projection = [t / aspect, 0, 0, 0, 0, t, 0, 0, 0, 0, (far + near) / (near - far), -1, 0, 0, 2 * far * near / (near - far), 0];
+    return multiply(projection, view);
+  }
+
+  var pending = false;
+  function redraw() {
+    if (pending) { return; }
+    pending = true;
+    requestAnimationFrame(render);
+  }
+  function render() {
+    pending = false;
+    var ratio = window.devicePixelRatio || 1;
+    canvas.width = canvas.clientWidth * ratio;
+    canvas.height = canvas.clientHeight * ratio;
+    gl.viewport(0, 0, canvas.width, canvas.height);
+    gl.clearColor(1, 1, 1, 1);
+    gl.enable(gl.DEPTH_TEST);
+    gl.clear(gl.COLOR_BUFFER_BIT | gl.DEPTH_BUFFER_BIT);
+    gl.uniformMatrix4fv(loc.mvp, false, matrix());
+    gl.uniform1f(loc.scale, 2 * ratio);
+
+    gl.bindBuffer(gl.ARRAY_BUFFER, positionBuffer);
+    gl.enableVertexAttribArray(loc.position);
+    gl.vertexAttribPointer(loc.position, 3, gl.FLOAT, false, 0, 0);
+    gl.bindBuffer(gl.ARRAY_BUFFER, sizeBuffer);
+    gl.enableVertexAttribArray(loc.size);
+    gl.vertexAttribPointer(loc.size, 1, gl.FLOAT, false, 0, 0);
+    gl.bindBuffer(gl.ARRAY_BUFFER, colorBuffer);
+    gl.enableVertexAttribArray(loc.color);
+    gl.vertexAttribPointer(loc.color, 4, gl.UNSIGNED_BYTE, true, 0, 0);
+    gl.uniform1f(loc.isPoints, 1);
+    gl.drawArrays(gl.POINTS, 0, n);
+
+    if (nucleusLines.length) { // constant color and size for the outline
+      gl.disableVertexAttribArray(loc.size);
+      gl.disableVertexAttribArray(loc.color);
+      gl.vertexAttrib1f(loc.size, 1);
+      gl.vertexAttrib4f(loc.color, 0.75, 0, 0.75, 1);
+      gl.bindBuffer(gl.ARRAY_BUFFER, nucleusBuffer);
+      gl.vertexAttribPointer(loc.position, 3, gl.FLOAT, false, 0, 0);
+      gl.uniform1f(loc.isPoints, 0);
+      gl.drawArrays(gl.LINES, 0, nucleusLines.length / 3);
+    }
+  }
+
+  var dragging = null;
+  canvas.onmousedown = function (e) { dragging = [e.clientX, e.clientY]; };
+  window.onmouseup = function () { dragging = null; };
+  window.onmousemove = function (e) {
+    if (!dragging) { return; }
+    camera.azimuth -= (e.clientX - dragging[0]) * 0.5;
+    camera.elevation = Math.max(-89, Math.min(89, camera.elevation + (e.clientY - dragging[1]) * 0.5));
+    dragging = [e.clientX, e.clientY];
+    redraw();
+  };
+  canvas.onwheel = function (e) { e.preventDefault(); camera.distance *= Math.exp(e.deltaY * 0.001); redraw(); };
+  canvas.ondblclick = function () { camera.elevation = home.elevation; camera.azimuth = home.azimuth; camera.distance = home.distance; redraw(); };
+  window.onresize = redraw;
+
+  select.onchange();
+})();
+</script>
+</body>
+</html>
+'''
+
+def packScene(df: pd.DataFrame, labelCoordinateList: list, size: bool):
+  '''
+  inputs: dataframe to plot, list to color coordinate data by, flag to modulate size
+  outputs: dictionary describing the buffer layout and the binary buffer
+
+  The goal of this function is to pack the scaled centers, point sizes and label codes into one buffer of typed arrays.
+  Positions and sizes are float32 and every label column is a uint16 code into its list of label names, padded to 4 bytes.
+  '''
+  positions = np.ascontiguousarray(df[['xcenter', 'ycenter', 'zcenter']].to_numpy(dtype=np.float32)) # interleaved x, y, z
+  if "totalDamages" in df.columns and size: # if direct and indirect (changing size of damage on plot since basically the number of damages)
+    sizes = df["totalDamages"].to_numpy(dtype=np.float32)
+  else: # same size for all points
+    sizes = np.ones(len(df.index), dtype=np.float32)
+
+  meta = {"count": len(df.index), "positions": 0, "sizes": positions.nbytes, "keys": []}
+  parts = [positions.tobytes(), sizes.tobytes()]
+  offset = positions.nbytes + sizes.nbytes
+  for key in labelCoordinateList: # one code array per label column
+    uniqueVals = draw.distinctValues(df, key) # same order as the png and video frames so labels get the same colors
+    codes = pd.Index(uniqueVals).get_indexer(df[key]) # position of each value among the unique values
+    meta["keys"].append({"name": key, "labels": [str(l) for l in uniqueVals], "offset": offset})
+    codes = codes.astype(np.uint16)
+    padding = (-codes.nbytes) % 4 # keep the next array aligned
+    parts.extend([codes.tobytes(), b"\0" * padding])
+    offset += codes.nbytes + padding
+
+  return meta, b"".join(parts)
+
+def exportHTML(df: pd.DataFrame, labelCoordinateList: list, outputDir: str, volumes: list, size: bool, angle_tup: tuple = None):
+  '''
+  inputs: dataframe to plot, list to color coordinate data by, output directory, scaled nucleus volume, flag to modulate size, optional starting angle
+  outputs: path of the html file saved to output directory
+
+  The goal of this function is to write a single html file that draws the damage with WebGL, so rotating, zooming and toggling labels happen in the browser without re-rendering in python.
+  The file has no outside dependencies and works offline.
+  '''
+  meta, buffer = packScene(df, labelCoordinateList, size)
+  meta["palette"] = [[int(round(255 * c)) for c in mcolors.to_rgb(color)] for color in sorted(list(mcolors.CSS4_COLORS))] # same colors as the video frames
+  meta["extent"] = float(np.abs(df[['xcenter', 'ycenter', 'zcenter']].to_numpy(dtype=float)).max()) if len(df.index) != 0 else 1.0
+  meta["angle"] = list(angle_tup) if angle_tup != None else [30, -60] # matplotlib default view
+  if len(volumes) == 7 and int(volumes[0]) == 1: # ellipsoid nucleus, same radii as graphNucleus
+    meta["nucleus"] = [abs(volumes[1] - volumes[4]), abs(volumes[2] - volumes[5]), abs(volumes[3] - volumes[6])]
+  else:
+    meta["nucleus"] = None
+
+  html = viewerTemplate.replace("__TITLE__", "DNA damage").replace("__DATA__", base64.b64encode(buffer).decode("ascii"))
+  html = html.replace("__META__", json.dumps(meta).replace("</", "<\\/")) # escaped so labels cannot close the script tag
+  path = os.path.join(outputDir, "damage.html")
+  with open(path, "w") as file:
+    file.write(html)
+  return path